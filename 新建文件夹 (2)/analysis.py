@@ -0,0 +1,148 @@
+import numpy as np
+
+
+# 交点细化时同时二分的最大区间数，超过后只做线性插值（避免慢函数卡住界面）
+REFINE_LIMIT = 2000
+# 二分次数，之后在剩下的小区间内线性插值
+REFINE_ITERATIONS = 12
+
+
+def connected_segments(n, breaks=()):
+    """长度为n-1的布尔数组：第i点与第i+1点之间是否连线"""
+    connected = np.ones(max(n - 1, 0), dtype=bool)
+    breaks = np.asarray(breaks, dtype=int)
+    connected[breaks[breaks > 0] - 1] = False
+    return connected
+
+
+def arc_length(xs, ys, breaks=()):
+    """累计弧长：第i个元素是从起点到第i点的折线长度（断开处不计），一次cumsum得到"""
+    steps = np.hypot(np.diff(xs), np.diff(ys))
+    steps[~connected_segments(len(xs), breaks)] = 0
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def crossings(xs, ys, level, breaks=(), evaluate=None, iterations=REFINE_ITERATIONS):
+    """曲线与水平线 y=level 的全部交点的x坐标
+
+    相邻两点分别位于水平线两侧（恰好在线上的点算作下方）的连线段里各有一个交点。
+    evaluate（接收x数组、返回画布y数组）不为None时，在所有区间上同时用真实函数值
+    二分细化，最后线性插值；否则直接在两点之间线性插值。曲线不是y = f(x)时
+    （参数方程、极坐标）不应传入evaluate。
+    """
+    d = np.asarray(ys, dtype=float) - level
+    above = d >= 0
+    index = np.flatnonzero((above[:-1] != above[1:]) & connected_segments(len(d), breaks))
+    a, b = xs[index].astype(float), xs[index + 1].astype(float)
+    fa, fb = d[index], d[index + 1]
+
+    if evaluate is not None and 0 < len(index) <= REFINE_LIMIT:
+        active = np.ones(len(index), dtype=bool)
+        with np.errstate(all="ignore"):
+            for _ in range(iterations):
+                mid = (a + b) / 2
+                try:
+                    fm = np.asarray(evaluate(mid), dtype=float) - level
+                except Exception:
+                    break
+                # 中点无定义的区间停止细化，保留当前区间
+                active &= np.isfinite(fm)
+                left = active & ((fm >= 0) == (fa >= 0))
+                right = active & ~left
+                a, fa = np.where(left, mid, a), np.where(left, fm, fa)
+                b, fb = np.where(right, mid, b), np.where(right, fm, fb)
+
+    with np.errstate(all="ignore"):
+        t = np.where(fa != fb, fa / (fa - fb), 0.0)
+    return a + np.clip(t, 0, 1) * (b - a)
+
+
+def extrema(xs, ys, breaks=(), refine=True):
+    """局部极值，返回 (极大值, 极小值)，每项是 (x数组, y数组)
+
+    ys是画布坐标（向下为正），所以画布y的局部最小值是函数的极大值。
+    平台（连续相等的值）取最后一个点；断开处两侧的点不算极值。
+    refine为True时用过相邻三点的抛物线顶点细化位置（只适用于x单调的函数曲线）。
+    """
+    ys = np.asarray(ys, dtype=float)
+    connected = connected_segments(len(ys), breaks)
+    slope = np.sign(np.diff(ys))
+    slope[~connected] = 0
+    # 平台处沿用前一个非零斜率
+    last = np.where(slope != 0, np.arange(len(slope)), 0)
+    np.maximum.accumulate(last, out=last)
+    before = slope[last][:-1]
+    after = slope[1:]
+    inner = connected[:-1] & connected[1:]
+    top = np.flatnonzero(inner & (before < 0) & (after > 0)) + 1
+    bottom = np.flatnonzero(inner & (before > 0) & (after < 0)) + 1
+    return _vertex(xs, ys, top, refine), _vertex(xs, ys, bottom, refine)
+
+
+def _vertex(xs, ys, index, refine):
+    """极值点坐标，refine时取过第index-1、index、index+1点的抛物线顶点"""
+    x1, y1 = xs[index].astype(float), ys[index]
+    if not refine or not len(index):
+        return x1, y1
+    x0, y0 = xs[index - 1], ys[index - 1]
+    x2, y2 = xs[index + 1], ys[index + 1]
+    with np.errstate(all="ignore"):
+        p = (x1 - x0) * (y1 - y2)
+        q = (x1 - x2) * (y1 - y0)
+        denom = 2 * (p - q)
+        dx = ((x1 - x0) * p - (x1 - x2) * q) / denom
+        # 平台或三点共线时保持原来的点
+        ok = np.isfinite(dx) & (np.abs(dx) <= np.maximum(np.abs(x1 - x0), np.abs(x2 - x1)))
+        dx = np.where(ok, dx, 0.0)
+        # 顶点的y：抛物线在顶点处的值
+        a = np.where(ok, ((y0 - y1) / (x0 - x1) - (y2 - y1) / (x2 - x1)) / (x0 - x2), 0.0)
+    return x1 - dx, y1 - np.where(ok, a * dx * dx, 0.0)
+
+
+class CurveAnalysis:
+    """一条已投影到画布坐标的曲线的分析结果
+
+    创建时一次计算累计弧长和局部极值；与水平线的交点按高度按需计算并缓存，
+    修改Y上限时不必重新分析。所有计算都是整个数组的向量化操作。
+    """
+
+    def __init__(self, xs, ys, breaks=(), evaluate=None, monotonic=True, clip=None):
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.breaks = np.asarray(breaks, dtype=int)
+        self.evaluate = evaluate if monotonic else None
+        self.monotonic = monotonic
+        self.cumulative = arc_length(self.xs, self.ys, self.breaks)
+        self.maxima, self.minima = extrema(self.xs, self.ys, self.breaks, refine=monotonic)
+        if clip is not None:
+            # 被截断到画布外的点形成的平台不是真正的极值
+            low, high = clip
+            self.maxima = _inside(self.maxima, low, high)
+            self.minima = _inside(self.minima, low, high)
+        self._crossings = {}
+
+    @property
+    def length(self):
+        return float(self.cumulative[-1]) if len(self.cumulative) else 0.0
+
+    def crossings(self, level):
+        """与水平线 y=level 的交点的x坐标数组"""
+        result = self._crossings.get(level)
+        if result is None:
+            result = self._crossings[level] = crossings(self.xs, self.ys, level, self.breaks,
+                                                        self.evaluate)
+        return result
+
+    def length_until(self, x):
+        """从起点到画布横坐标x处的弧长（只适用于x单调的函数曲线）"""
+        return float(np.interp(x, self.xs, self.cumulative))
+
+    def summary(self, level):
+        return (f"穿越上限 {len(self.crossings(level))} 次 | 极大值 {len(self.maxima[0])} 个 | "
+                f"极小值 {len(self.minima[0])} 个 | 弧长 {self.length:.2f}")
+
+
+def _inside(points, low, high):
+    xs, ys = points
+    keep = (ys > low) & (ys < high)
+    return xs[keep], ys[keep]
@@ -0,0 +1,12 @@
+import math
+
+def archimedes_spiral(theta, width, center_y, amp, freq):
+    # theta: 极角（弧度），第一个参数名为theta表示极坐标方程
+    # width: 画布宽度
+    # center_y: 中心y坐标
+    # amp: 振幅
+    # freq: 频率
+    
+    # 阿基米德螺线：半径随角度均匀增大，每圈增大amp
+    r = amp * theta / (2 * math.pi)
+    return r
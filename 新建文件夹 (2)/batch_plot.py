@@ -0,0 +1,132 @@
+"""无界面批量绘图：把函数文件按参数网格渲染成BMP/PNG图片
+
+示例:
+    python batch_plot.py wave_func.py spiral_func.py sine --amp 50 100 --freq 1 2 5 \\
+        --width 700 1400 --height 500 --out plots --format png
+"""
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from func_loader import FunctionCache
+from raster import Raster
+from renderer import prepare_points
+from sampler import BUILTIN_TYPES, adaptive_sample, compute_scale, curve_grid, evaluate_builtin, \
+    evaluate_curve, fit_curve, function_kind, sample_function, sample_grid
+
+
+# 每个进程各自的函数缓存
+_cache = None
+
+
+def parse_function(spec):
+    """把命令行参数解析为 (名称, 文件路径或None, 函数名)
+
+    支持内置函数名（sine等）、"文件.py"（函数名与文件名相同）
+    以及"文件.py:函数名"。
+    """
+    if spec in BUILTIN_TYPES:
+        return spec, None, spec
+    path, _, func_name = spec.partition(":")
+    stem = os.path.splitext(os.path.basename(path))[0]
+    func_name = func_name or stem
+    name = stem if func_name == stem else f"{stem}.{func_name}"
+    return name, os.path.abspath(path), func_name
+
+
+def render(name, file_path, func_name, amp, freq, width, height, tolerance=None):
+    """与 auto_draw 相同的采样和自动缩放，结果画进内存中的像素缓冲区"""
+    global _cache
+    center_y = height / 2
+    kind = "function"
+
+    if file_path is None:
+        def evaluate(xs):
+            return evaluate_builtin(func_name, xs, width, center_y, amp, freq)
+    else:
+        if _cache is None:
+            _cache = FunctionCache()
+        func = _cache.load(file_path, func_name)
+        kind = function_kind(func)
+
+        def evaluate(xs):
+            return sample_function("custom", xs, width, center_y, amp, freq, func)[0]
+
+    if kind != "function":
+        # 参数方程/极坐标曲线：两个方向同比例缩放到图像中央
+        points, _ = evaluate_curve(func, kind, curve_grid(), width, center_y, amp, freq)
+        scale_factor, offset_x, offset_y = fit_curve(points[0], points[1], width, height)
+        xs, points_y, breaks = prepare_points(points[0] * scale_factor + offset_x,
+                                              points[1] * scale_factor + offset_y, height)
+    else:
+        if tolerance:
+            xs, ys = adaptive_sample(evaluate, 0, width, height, center_y, tolerance)
+        else:
+            xs = sample_grid(0, width, 2)
+            ys = evaluate(xs)
+
+        scale_factor, offset_y = compute_scale(ys, height, center_y)
+        xs, points_y, breaks = prepare_points(xs, ys * scale_factor + offset_y, height)
+
+    raster = Raster(width, height)
+    raster.draw_polyline(xs, points_y, color=(0, 128, 0), line_width=2, breaks=breaks)
+    if len(xs):
+        raster.fill_circle(xs[0], points_y[0], 3, (0, 128, 0))
+    return raster
+
+
+def run_job(job):
+    """进程池中执行的任务，返回 (输出路径, 错误信息)"""
+    name, file_path, func_name, amp, freq, width, height, out_path, tolerance = job
+    try:
+        render(name, file_path, func_name, amp, freq, width, height, tolerance).save(out_path)
+        return out_path, None
+    except Exception as e:
+        return out_path, f"{type(e).__name__}: {e}"
+
+
+def build_jobs(args):
+    """按函数和参数网格展开任务列表"""
+    jobs = []
+    for spec in args.functions:
+        name, file_path, func_name = parse_function(spec)
+        for amp, freq, width, height in itertools.product(args.amp, args.freq, args.width, args.height):
+            file_name = f"{name}_a{amp:g}_f{freq:g}_{width}x{height}.{args.format}"
+            jobs.append((name, file_path, func_name, amp, freq, width, height,
+                         os.path.join(args.out, file_name), args.tolerance))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量绘制函数图像")
+    parser.add_argument("functions", nargs="+",
+                        help="内置函数名(sine/cosine/parabola/linear)、函数文件.py 或 文件.py:函数名")
+    parser.add_argument("--amp", type=float, nargs="+", default=[100], help="振幅列表")
+    parser.add_argument("--freq", type=float, nargs="+", default=[2], help="频率列表")
+    parser.add_argument("--width", type=int, nargs="+", default=[700], help="图像宽度列表")
+    parser.add_argument("--height", type=int, nargs="+", default=[500], help="图像高度列表")
+    parser.add_argument("--out", default="plots", help="输出目录")
+    parser.add_argument("--format", choices=["png", "bmp"], default="png", help="图片格式")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="使用自适应采样，指定像素容差")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为CPU核数")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    jobs = build_jobs(args)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        chunksize = max(1, len(jobs) // (4 * (args.workers or os.cpu_count() or 1)))
+        for out_path, error in executor.map(run_job, jobs, chunksize=chunksize):
+            if error:
+                failures += 1
+                print(f"失败: {out_path} | {error}", file=sys.stderr)
+
+    print(f"完成 {len(jobs) - failures}/{len(jobs)} 张图片，输出目录: {args.out}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""绘图流程基准测试
+
+分别测量 auto_draw 的各个阶段：函数文件加载、Y值计算（内置函数和
+示例函数）、自动缩放计算、画布对象创建。结果保存为JSON，可以用
+--compare 与之前的结果对比。
+
+示例:
+    python benchmark.py --widths 700 1400 8000 --out bench.json
+    python benchmark.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from func_loader import FunctionCache
+from renderer import PolylineRenderer, flatten_points
+from sampler import BUILTIN_TYPES, compute_scale, evaluate_builtin, evaluate_custom, sample_grid
+
+
+DEFAULT_WIDTHS = [700, 1400, 2800, 5600, 8000]
+SAMPLE_FUNCTIONS = [("custom_func", "custom_func"), ("test_func", "test_func"),
+                    ("wave_func", "wave_func"), ("spiral_func", "spiral_func"),
+                    ("test_custom", "custom_func"), ("test_custom", "another_func")]
+HEIGHT = 500
+AMP = 100
+FREQ = 2
+
+
+class StubCanvas:
+    """只记录调用次数的假画布，用于在没有显示器时测量画布调用开销"""
+
+    def __init__(self):
+        self.items = 0
+        self.calls = 0
+
+    def create_line(self, *args, **kwargs):
+        self.items += 1
+        self.calls += 1
+        return self.items
+
+    def coords(self, item, *args):
+        self.calls += 1
+
+    def delete(self, *tags):
+        self.calls += 1
+
+
+def measure(func, repeat, track_memory=True):
+    """重复执行func，返回每次耗时（秒）和峰值内存（字节）"""
+    func()  # 预热
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    peak = None
+    if track_memory:
+        # 单独跑一次测量内存，避免tracemalloc影响计时
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return times, peak
+
+
+def summarize(times, points, peak):
+    times = np.asarray(times)
+    return {
+        "points": points,
+        "runs": len(times),
+        "mean_ms": float(times.mean() * 1e3),
+        "p50_ms": float(np.percentile(times, 50) * 1e3),
+        "p90_ms": float(np.percentile(times, 90) * 1e3),
+        "p99_ms": float(np.percentile(times, 99) * 1e3),
+        "points_per_s": float(points / times.mean()) if points and times.mean() > 0 else None,
+        "peak_bytes": peak,
+    }
+
+
+def make_canvas(use_tk):
+    """返回 (画布, 清理函数)；没有显示器时退回假画布"""
+    if use_tk:
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+            canvas = tk.Canvas(root, width=800, height=HEIGHT)
+            return canvas, root.destroy
+        except Exception as e:
+            print(f"无法创建Tk画布，使用假画布: {e}", file=sys.stderr)
+    return StubCanvas(), lambda: None
+
+
+def run(widths, repeat, use_tk):
+    results = []
+
+    def record(stage, name, width, times, points, peak):
+        entry = {"stage": stage, "name": name, "width": width}
+        entry.update(summarize(times, points, peak))
+        results.append(entry)
+        size = f"{width}px" if width else "-"
+        print(f"{stage:<10} {name:<32} {size:>7}  {entry['mean_ms']:9.3f} ms  "
+              f"p99 {entry['p99_ms']:9.3f} ms  {entry['points_per_s'] or 0:14,.0f} 点/秒")
+
+    # 函数文件加载：冷加载（每次新建缓存）和热加载（命中缓存）
+    for file_name, func_name in SAMPLE_FUNCTIONS:
+        path = f"{file_name}.py"
+        label = f"{file_name}.{func_name}"
+        times, peak = measure(lambda: FunctionCache().load(path, func_name), repeat)
+        record("load_cold", label, None, times, 0, peak)
+        warm = FunctionCache()
+        times, peak = measure(lambda: warm.load(path, func_name), repeat)
+        record("load_warm", label, None, times, 0, peak)
+
+    compiled = FunctionCache()
+    plain = FunctionCache(compile_expressions=False)
+    canvas, cleanup = make_canvas(use_tk)
+    try:
+        for width in widths:
+            xs = sample_grid(0, width, 2)
+            center_y = HEIGHT / 2
+            n = len(xs)
+
+            # Y值计算
+            for func_type in BUILTIN_TYPES:
+                times, peak = measure(
+                    lambda: evaluate_builtin(func_type, xs, width, center_y, AMP, FREQ), repeat)
+                record("eval", func_type, width, times, n, peak)
+            for file_name, func_name in SAMPLE_FUNCTIONS:
+                label = f"{file_name}.{func_name}"
+                for cache, suffix in ((compiled, "compiled"), (plain, "scalar")):
+                    func = cache.load(f"{file_name}.py", func_name)
+                    times, peak = measure(
+                        lambda: evaluate_custom(func, xs, width, center_y, AMP, FREQ), repeat)
+                    record("eval", f"{label}[{suffix}]", width, times, n, peak)
+
+            # 自动缩放
+            ys = evaluate_builtin("sine", xs, width, center_y, AMP, FREQ)
+            times, peak = measure(lambda: compute_scale(ys, HEIGHT, center_y), repeat)
+            record("scale", "compute_scale", width, times, n, peak)
+
+            # 画布对象创建：逐段create_line（旧实现）与多点折线
+            scale_factor, offset_y = compute_scale(ys, HEIGHT, center_y)
+            points_y = ys * scale_factor + offset_y
+            coords = flatten_points(xs, points_y)
+
+            def per_segment():
+                for i in range(0, len(coords) - 2, 2):
+                    canvas.create_line(coords[i], coords[i + 1], coords[i + 2], coords[i + 3],
+                                       fill="green", width=2, tags="bench")
+                canvas.delete("bench")
+
+            def polyline():
+                PolylineRenderer(canvas, coords, "bench", fill="green", width=2).draw_all()
+                canvas.delete("bench")
+
+            times, peak = measure(per_segment, repeat, track_memory=False)
+            record("canvas", "per_segment", width, times, n, peak)
+            times, peak = measure(polyline, repeat, track_memory=False)
+            record("canvas", "polyline", width, times, n, peak)
+    finally:
+        cleanup()
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "canvas": type(canvas).__name__,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(old_path, new_report, threshold=1.1):
+    """与之前的结果对比，列出变慢超过阈值的项"""
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["stage"], r["name"], r["width"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for r in new_report["results"]:
+        before = old.get((r["stage"], r["name"], r["width"]))
+        if not before or not before["p50_ms"]:
+            continue
+        ratio = r["p50_ms"] / before["p50_ms"]
+        if ratio > threshold:
+            regressions += 1
+            print(f"变慢 {ratio:5.2f}x  {r['stage']} {r['name']} {r['width']}px: "
+                  f"{before['p50_ms']:.3f} -> {r['p50_ms']:.3f} ms")
+    print(f"共 {regressions} 项变慢超过 {threshold - 1:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="绘图流程基准测试")
+    parser.add_argument("--widths", type=int, nargs="+", default=DEFAULT_WIDTHS, help="画布宽度列表")
+    parser.add_argument("--repeat", type=int, default=20, help="每项重复次数")
+    parser.add_argument("--tk", action="store_true", help="使用真实的Tk画布（需要显示器）")
+    parser.add_argument("--out", default="benchmark_results.json", help="结果JSON文件")
+    parser.add_argument("--compare", help="与之前保存的结果JSON对比")
+    args = parser.parse_args(argv)
+
+    report = run(args.widths, args.repeat, args.tk)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {os.path.abspath(args.out)}")
+
+    if args.compare:
+        return 1 if compare(args.compare, report) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+
+class CurveCache:
+    """采样结果缓存，按占用内存限制大小，LRU淘汰
+
+    键由调用方组成，通常包括函数标识/版本、振幅、频率、画布宽度和
+    采样方式；值为 (x数组, y数组)。
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """命中时返回 (x数组, y数组)，否则返回None"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, xs, ys):
+        """保存一条曲线，超出内存上限时淘汰最久未使用的曲线"""
+        nbytes = xs.nbytes + ys.nbytes
+        if nbytes > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[0].nbytes + old[1].nbytes
+        self.entries[key] = (xs, ys)
+        self.size += nbytes
+        while self.size > self.max_bytes:
+            _, (old_xs, old_ys) = self.entries.popitem(last=False)
+            self.size -= old_xs.nbytes + old_ys.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
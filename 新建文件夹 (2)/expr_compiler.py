@@ -0,0 +1,300 @@
+import ast
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+class CompileError(Exception):
+    """函数不能编译为表达式（含有不支持的语法或调用）"""
+
+
+# 自定义函数的参数，按位置对应
+PARAMS = ("x", "width", "center_y", "amp", "freq")
+
+MATH_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf}
+
+# math函数 -> numpy函数
+MATH_FUNCTIONS = {
+    "sin": "sin", "cos": "cos", "tan": "tan",
+    "asin": "arcsin", "acos": "arccos", "atan": "arctan", "atan2": "arctan2",
+    "sinh": "sinh", "cosh": "cosh", "tanh": "tanh",
+    "asinh": "arcsinh", "acosh": "arccosh", "atanh": "arctanh",
+    "exp": "exp", "expm1": "expm1", "log": "log", "log10": "log10", "log2": "log2",
+    "log1p": "log1p", "sqrt": "sqrt", "pow": "power", "hypot": "hypot",
+    "fabs": "fabs", "floor": "floor", "ceil": "ceil", "trunc": "trunc",
+    "degrees": "degrees", "radians": "radians", "copysign": "copysign",
+}
+
+# 允许的内置函数 -> numpy函数
+BUILTIN_FUNCTIONS = {"abs": "abs", "min": "minimum", "max": "maximum"}
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+
+# 执行编译后代码时唯一可见的名字
+_SAFE_BUILTINS = {"abs": abs, "min": min, "max": max}
+
+
+def is_pure_module(tree):
+    """模块是否只包含 import math、文档字符串和函数定义（导入时没有副作用）"""
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Import):
+            if any(alias.name != "math" or alias.asname for alias in stmt.names):
+                return False
+        elif isinstance(stmt, ast.FunctionDef):
+            continue
+        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+            continue
+        else:
+            return False
+    return True
+
+
+def _is_math(node):
+    return isinstance(node, ast.Name) and node.id == "math"
+
+
+class _Inliner:
+    """检查函数体中的每个节点，并把局部变量内联成单个表达式"""
+
+    def __init__(self, arg_names):
+        # 参数按位置映射到标准参数名
+        self.env = {name: ast.Name(id=PARAMS[i], ctx=ast.Load()) for i, name in enumerate(arg_names)}
+
+    def visit(self, node):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise CompileError(f"不支持的常量: {node.value!r}")
+            return ast.Constant(value=node.value)
+        if isinstance(node, ast.Name):
+            if node.id not in self.env:
+                raise CompileError(f"未知的名称: {node.id}")
+            return _copy(self.env[node.id])
+        if isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BIN_OPS):
+                raise CompileError(f"不支持的运算: {type(node.op).__name__}")
+            return ast.BinOp(left=self.visit(node.left), op=node.op, right=self.visit(node.right))
+        if isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPS):
+                raise CompileError(f"不支持的运算: {type(node.op).__name__}")
+            return ast.UnaryOp(op=node.op, operand=self.visit(node.operand))
+        if isinstance(node, ast.Attribute):
+            if _is_math(node.value) and node.attr in MATH_CONSTANTS:
+                return ast.Attribute(value=ast.Name(id="math", ctx=ast.Load()), attr=node.attr, ctx=ast.Load())
+            raise CompileError(f"不支持的属性: {ast.unparse(node)}")
+        if isinstance(node, ast.Call):
+            if node.keywords:
+                raise CompileError("不支持关键字参数")
+            func = node.func
+            if isinstance(func, ast.Attribute) and _is_math(func.value) and func.attr in MATH_FUNCTIONS:
+                callee = ast.Attribute(value=ast.Name(id="math", ctx=ast.Load()), attr=func.attr, ctx=ast.Load())
+            elif isinstance(func, ast.Name) and func.id in BUILTIN_FUNCTIONS and func.id not in self.env:
+                callee = ast.Name(id=func.id, ctx=ast.Load())
+            else:
+                raise CompileError(f"不支持的函数调用: {ast.unparse(func)}")
+            return ast.Call(func=callee, args=[self.visit(arg) for arg in node.args], keywords=[])
+        raise CompileError(f"不支持的语法: {type(node).__name__}")
+
+    def inline_body(self, body):
+        """处理 "赋值...; return 表达式" 形式的函数体"""
+        statements = list(body)
+        if statements and isinstance(statements[0], ast.Expr) and isinstance(statements[0].value, ast.Constant):
+            statements = statements[1:]  # 文档字符串
+        if not statements or not isinstance(statements[-1], ast.Return) or statements[-1].value is None:
+            raise CompileError("函数体必须以 return 表达式 结尾")
+        for stmt in statements[:-1]:
+            if not (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                    and isinstance(stmt.targets[0], ast.Name)):
+                raise CompileError(f"不支持的语句: {type(stmt).__name__}")
+            self.env[stmt.targets[0].id] = self.visit(stmt.value)
+        value = statements[-1].value
+        if isinstance(value, ast.Tuple) and len(value.elts) == 2:
+            # 参数方程返回 (x, y)
+            return ast.Tuple(elts=[self.visit(elt) for elt in value.elts], ctx=ast.Load())
+        return self.visit(value)
+
+
+def _copy(node):
+    return ast.parse(ast.unparse(node), mode="eval").body
+
+
+def _depends_on_x(node):
+    return any(isinstance(n, ast.Name) and n.id == "x" for n in ast.walk(node))
+
+
+def _const_eval(node, values):
+    """按Python标量语义计算与x无关的子表达式"""
+    code = compile(ast.fix_missing_locations(ast.Expression(body=node)), "<expr>", "eval")
+    value = eval(code, {"__builtins__": _SAFE_BUILTINS, "math": math}, values)
+    if isinstance(value, complex) or not isinstance(value, (int, float)):
+        raise CompileError(f"常量部分不是实数: {value!r}")
+    return float(value)
+
+
+class _Folder(ast.NodeTransformer):
+    """常量折叠：把所有与x无关的子树（如 freq * 2 * math.pi / width）替换为常量"""
+
+    def __init__(self, values):
+        self.values = values
+
+    def generic_visit(self, node):
+        if isinstance(node, ast.expr) and not _depends_on_x(node):
+            return ast.Constant(value=_const_eval(node, self.values))
+        return super().generic_visit(node)
+
+    def visit_Call(self, node):
+        if not _depends_on_x(node):
+            return ast.Constant(value=_const_eval(node, self.values))
+        # 被调用的函数本身不折叠
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_Tuple(self, node):
+        # (x, y) 的两个分量分别折叠
+        node.elts = [self.visit(elt) for elt in node.elts]
+        return node
+
+
+class _NumpyEmitter(ast.NodeTransformer):
+    """把math调用改写为numpy调用"""
+
+    @staticmethod
+    def _np(name):
+        return ast.Attribute(value=ast.Name(id="np", ctx=ast.Load()), attr=name, ctx=ast.Load())
+
+    def visit_Call(self, node):
+        node.args = [self.visit(arg) for arg in node.args]
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else func.id
+        if isinstance(func, ast.Attribute) and name == "log" and len(node.args) == 2:
+            # math.log(a, b) = log(a) / log(b)
+            return ast.BinOp(left=ast.Call(func=self._np("log"), args=[node.args[0]], keywords=[]),
+                             op=ast.Div(),
+                             right=ast.Call(func=self._np("log"), args=[node.args[1]], keywords=[]))
+        if isinstance(func, ast.Name) and name in ("min", "max"):
+            # min/max 多个参数时两两嵌套
+            result = node.args[0]
+            for arg in node.args[1:]:
+                result = ast.Call(func=self._np(BUILTIN_FUNCTIONS[name]), args=[result, arg], keywords=[])
+            return result
+        table = MATH_FUNCTIONS if isinstance(func, ast.Attribute) else BUILTIN_FUNCTIONS
+        return ast.Call(func=self._np(table[name]), args=node.args, keywords=[])
+
+    def visit_Attribute(self, node):
+        if _is_math(node.value) and node.attr in MATH_CONSTANTS:
+            return ast.Constant(value=MATH_CONSTANTS[node.attr])
+        return node
+
+
+class CompiledFunction:
+    """编译后的自定义函数
+
+    调用方式与原函数相同，x可以是标量或numpy数组。每组画布参数
+    (width, center_y, amp, freq) 都会生成一个常量折叠后的专用向量化
+    计算器；结果不是有限实数的点（如负数的小数次幂、定义域外的log）
+    用标量版本逐点重新计算，保证与原来的逐点语义一致。
+    返回 (x, y) 的参数方程对数组输入返回形状为 (2, n) 的数组。
+    """
+
+    vectorized = True
+
+    def __init__(self, name, expr, scalar_func, max_specialized=16):
+        self.__name__ = name
+        self.expr = expr
+        self.scalar_func = scalar_func
+        self.components = len(expr.elts) if isinstance(expr, ast.Tuple) else 1
+        self.max_specialized = max_specialized
+        self.specialized = OrderedDict()
+
+    def specialize(self, width, center_y, amp, freq):
+        """返回只接收x数组的计算器"""
+        key = (width, center_y, amp, freq)
+        evaluator = self.specialized.get(key)
+        if evaluator is None:
+            values = dict(zip(PARAMS[1:], key))
+            folded = _Folder(values).visit(_copy(self.expr))
+            body = _NumpyEmitter().visit(folded)
+            lam = ast.Lambda(args=ast.arguments(posonlyargs=[], args=[ast.arg(arg="x")], kwonlyargs=[],
+                                                kw_defaults=[], defaults=[]),
+                             body=body)
+            code = compile(ast.fix_missing_locations(ast.Expression(body=lam)), f"<{self.__name__}>", "eval")
+            evaluator = eval(code, {"__builtins__": {}, "np": np})
+            self.specialized[key] = evaluator
+            while len(self.specialized) > self.max_specialized:
+                self.specialized.popitem(last=False)
+        self.specialized.move_to_end(key)
+        return evaluator
+
+    def source(self):
+        """编译后的表达式（未折叠）"""
+        return ast.unparse(self.expr)
+
+    def __call__(self, x, width, center_y, amp, freq):
+        scalar = np.ndim(x) == 0
+        try:
+            evaluator = self.specialize(width, center_y, amp, freq)
+        except Exception:
+            # 常量部分无法按实数计算（如溢出、复数），退回标量版本
+            evaluator = None
+        if evaluator is None or scalar:
+            if scalar:
+                return self.scalar_func(x, width, center_y, amp, freq)
+            values = np.array([self.scalar_func(v, width, center_y, amp, freq) for v in np.asarray(x).tolist()])
+            return values.T if self.components > 1 else values
+
+        xs = np.asarray(x, dtype=float)
+        with np.errstate(all="ignore"):
+            result = evaluator(xs)
+            if self.components > 1:
+                ys = np.empty((self.components,) + xs.shape)
+                for row, value in zip(ys, result):
+                    row[...] = value
+            else:
+                ys = np.broadcast_to(np.asarray(result, dtype=float), xs.shape).copy()
+        bad = ~np.isfinite(ys)
+        if self.components > 1:
+            bad = bad.any(axis=0)
+        rows = ys.reshape(self.components, -1)
+        for i in np.flatnonzero(bad).tolist():
+            # 与原函数的逐点结果保持一致（复数取实部，异常照常抛出）
+            result = self.scalar_func(float(xs.flat[i]), width, center_y, amp, freq)
+            rows[:, i] = [_real(v) for v in result] if self.components > 1 else _real(result)
+        return ys
+
+
+def _real(value):
+    return value.real if isinstance(value, complex) else value
+
+
+def compile_function(source, func_name):
+    """把源码中名为func_name的单表达式函数编译为CompiledFunction
+
+    source可以是源码字符串或已解析的ast.Module。模块只能包含
+    import math 和函数定义；函数体只能由简单赋值和最后的 return 组成，
+    只允许算术运算、math中的函数和常量以及 abs/min/max。
+    不满足条件时抛出CompileError，调用方应退回普通的导入执行方式。
+    """
+    try:
+        tree = ast.parse(source) if isinstance(source, (str, bytes)) else source
+    except SyntaxError as e:
+        raise CompileError(f"语法错误: {e}")
+    if not is_pure_module(tree):
+        raise CompileError("模块中含有函数定义以外的代码")
+
+    func_def = next((stmt for stmt in tree.body
+                     if isinstance(stmt, ast.FunctionDef) and stmt.name == func_name), None)
+    if func_def is None:
+        raise CompileError(f"未找到函数 '{func_name}'")
+    args = func_def.args
+    if (func_def.decorator_list or args.posonlyargs or args.vararg or args.kwonlyargs
+            or args.kwarg or args.defaults or len(args.args) != len(PARAMS)):
+        raise CompileError("函数参数必须是 (x, width, center_y, amp, freq)")
+
+    expr = _Inliner([arg.arg for arg in args.args]).inline_body(func_def.body)
+
+    # 标量版本：只执行已检查过的函数定义，命名空间中只有math和少量内置函数
+    namespace = {"__builtins__": _SAFE_BUILTINS, "math": math}
+    module = ast.Module(body=[func_def], type_ignores=[])
+    exec(compile(module, f"<{func_name}>", "exec"), namespace)
+    return CompiledFunction(func_name, expr, namespace[func_name])
@@ -0,0 +1,111 @@
+import ast
+import os
+
+
+# 可绘制函数的参数个数：(x, width, center_y, amp, freq)
+PARAM_COUNT = 5
+
+# 引擎模块，不是自定义函数文件；函数文件与它们在同一目录，不能用这些名称保存
+ENGINE_MODULES = {"main", "sampler", "renderer", "scheduler", "func_loader", "worker",
+                  "curve_cache", "raster", "batch_plot", "expr_compiler",
+                  "benchmark", "strokes", "func_index", "lod",
+                  "lazy_import", "perf", "analysis", "interval", "sample_cache"}
+
+
+def split_name(name):
+    """把下拉框中的名称拆成 (文件路径, 函数名)
+
+    "文件" 表示函数名与文件名相同，"文件:函数名" 表示文件中的另一个函数。
+    """
+    stem, _, func_name = name.partition(":")
+    return f"{stem}.py", func_name or stem
+
+
+def is_engine_module(name):
+    """名称对应的文件是否是引擎模块（Windows上文件名不区分大小写）"""
+    file_path, _ = split_name(name)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return stem.lower() in ENGINE_MODULES
+
+
+def entry_name(stem, func_name):
+    """split_name 的逆操作"""
+    return stem if func_name == stem else f"{stem}:{func_name}"
+
+
+def accepts_params(node, count=PARAM_COUNT):
+    """函数定义能否按位置接收count个参数"""
+    args = node.args
+    positional = args.posonlyargs + args.args
+    required = len(positional) - len(args.defaults)
+    if args.vararg is not None:
+        return required <= count
+    return required <= count <= len(positional)
+
+
+def plottable_functions(source):
+    """返回源码中可以用来绘图的模块级函数名（语法错误时返回空列表）"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    return [node.name for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and accepts_params(node)]
+
+
+class FunctionIndex:
+    """函数文件索引：记录目录中每个.py文件里可绘制的函数
+
+    scan() 用 os.scandir 遍历目录，只重新解析修改时间或大小变化的文件，
+    目录中有大量函数文件时也可以频繁调用。
+    """
+
+    def __init__(self, directory=".", exclude=()):
+        self.directory = directory
+        self.exclude = set(exclude)
+        self.files = {}  # 文件名(不含.py) -> ((修改时间, 大小), [函数名])
+
+    def scan(self):
+        """扫描目录，返回索引是否有变化"""
+        changed = False
+        seen = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".py"):
+                    continue
+                stem = entry.name[:-3]
+                if stem in self.exclude:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                seen.add(stem)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                cached = self.files.get(stem)
+                if cached is not None and cached[0] == stamp:
+                    continue
+                functions = self._parse(entry.path)
+                if cached is None or cached[1] != functions:
+                    changed = True
+                self.files[stem] = (stamp, functions)
+
+        for stem in set(self.files) - seen:
+            del self.files[stem]
+            changed = True
+        return changed
+
+    def _parse(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return plottable_functions(f.read())
+        except (OSError, UnicodeDecodeError):
+            return []
+
+    def names(self):
+        """按文件名排序的下拉框条目"""
+        return [entry_name(stem, func_name)
+                for stem in sorted(self.files)
+                for func_name in self.files[stem][1]]
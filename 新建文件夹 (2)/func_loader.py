@@ -0,0 +1,175 @@
+import ast
+import hashlib
+import os
+import types
+from collections import OrderedDict
+
+from expr_compiler import CompileError, compile_function, is_pure_module
+
+
+# 编辑器中的代码编译时使用的文件名，出现在错误信息和回溯中
+EDITOR_NAME = "<编辑器>"
+
+
+class LoadError(Exception):
+    """自定义函数无法加载（文件不存在、函数不存在等）"""
+
+
+class _Entry:
+    """一个已编译的函数文件"""
+
+    def __init__(self, key, stamp, digest, source):
+        self.key = key
+        self.stamp = stamp
+        self.digest = digest
+        self.source = source
+        self.tree = None
+        self.code = None
+        self.module = None
+        self.functions = {}
+
+
+class FunctionCache:
+    """自定义函数加载缓存
+
+    以文件路径为键，用 (mtime, size) 快速判断文件是否变化，变化时再用
+    内容哈希确认，只有内容真正改变时才重新编译和执行。缓存已编译的
+    代码对象和解析出的函数，按LRU淘汰。
+
+    compile_expressions为True时，只含 import math 和函数定义的文件不会
+    被执行：单表达式函数直接由expr_compiler编译为向量化计算器，
+    无法编译的函数才退回到执行整个模块。
+    """
+
+    def __init__(self, max_entries=32, compile_expressions=True):
+        self.max_entries = max_entries
+        self.compile_expressions = compile_expressions
+        self.entries = OrderedDict()
+        # 编辑器中的代码在内存中编译的结果，只保留最近一份
+        self.preview = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, file_path, func_name):
+        """返回文件中名为func_name的函数"""
+        key = os.path.abspath(file_path)
+        try:
+            st = os.stat(key)
+        except FileNotFoundError:
+            self.entries.pop(key, None)
+            raise LoadError(f"文件 '{file_path}' 不存在")
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        entry = self.entries.get(key)
+        if entry is None or entry.stamp != stamp:
+            with open(key, "rb") as f:
+                source = f.read()
+            entry = self._build(key, func_name, stamp, source, entry)
+        else:
+            self.hits += 1
+        self.entries.move_to_end(key)
+        return self._function(entry, func_name)
+
+    def compile_source(self, source, func_name, filename=EDITOR_NAME):
+        """在内存中编译一段代码（编辑器中的内容），不读写文件，返回 (函数, 版本)
+
+        版本是语法树的哈希，只改动注释和空白时不变，调用方据此判断是否需要
+        重新采样；版本不变时直接返回上次编译的函数。语法错误抛出SyntaxError，
+        找不到函数抛出LoadError，执行模块时的错误原样抛出。
+        """
+        tree = ast.parse(source, filename)
+        version = hashlib.sha256(ast.dump(tree).encode("utf-8")).hexdigest()
+        entry = self.preview
+        if entry is None or entry.digest != version or entry.key != filename:
+            entry = _Entry(filename, None, version, source)
+            if self.compile_expressions and is_pure_module(tree):
+                entry.tree = tree
+            else:
+                self._execute(entry, func_name)
+            self.preview = entry
+        return self._function(entry, func_name), version
+
+    def store(self, file_path, func_name, source):
+        """save_custom_function写入新内容后调用，直接用新源码更新缓存"""
+        key = os.path.abspath(file_path)
+        try:
+            st = os.stat(key)
+        except FileNotFoundError:
+            self.invalidate(file_path)
+            return
+        try:
+            self._build(key, func_name, (st.st_mtime_ns, st.st_size),
+                        source.encode("utf-8"), self.entries.get(key))
+        except Exception:
+            # 代码有错误时留到下次加载再报告
+            self.invalidate(file_path)
+
+    def version(self, file_path):
+        """返回已缓存文件的内容哈希，未缓存时返回None"""
+        entry = self.entries.get(os.path.abspath(file_path))
+        return entry.digest if entry else None
+
+    def invalidate(self, file_path):
+        """丢弃某个文件的缓存"""
+        self.entries.pop(os.path.abspath(file_path), None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def _build(self, key, func_name, stamp, source, old):
+        # 哈希不受换行符影响：Windows上保存的文件与编辑框中的代码得到相同的版本
+        digest = hashlib.sha256(source.replace(b"\r\n", b"\n")).hexdigest()
+        if old is not None and old.digest == digest:
+            # 只有时间戳变了，内容没变
+            old.stamp = stamp
+            self.hits += 1
+            return old
+
+        self.misses += 1
+        entry = _Entry(key, stamp, digest, source)
+        if self.compile_expressions:
+            try:
+                tree = ast.parse(source, key)
+            except SyntaxError:
+                tree = None
+            if tree is not None and is_pure_module(tree):
+                # 不执行模块，函数在第一次使用时再编译
+                entry.tree = tree
+        if entry.tree is None:
+            self._execute(entry, func_name)
+
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def _execute(self, entry, func_name):
+        """编译并执行整个模块"""
+        entry.code = compile(entry.source, entry.key, "exec")
+        module = types.ModuleType(func_name)
+        module.__file__ = entry.key
+        exec(entry.code, module.__dict__)
+        entry.module = module
+
+    def _function(self, entry, func_name):
+        """取出并缓存条目中的函数"""
+        func = entry.functions.get(func_name)
+        if func is None:
+            func = self._resolve(entry, func_name)
+            if not callable(func):
+                # 列出模块中所有可用的函数
+                available_funcs = [name for name in dir(entry.module) if not name.startswith('_')]
+                func_list = ', '.join(available_funcs)
+                raise LoadError(f"文件中未找到函数 '{func_name}'，可用函数: {func_list}")
+            entry.functions[func_name] = func
+        return func
+
+    def _resolve(self, entry, func_name):
+        """取出函数：优先使用表达式编译结果，否则从执行后的模块中取"""
+        if entry.module is None:
+            try:
+                return compile_function(entry.tree, func_name)
+            except CompileError:
+                self._execute(entry, func_name)
+        return getattr(entry.module, func_name, None)
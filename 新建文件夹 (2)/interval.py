@@ -0,0 +1,294 @@
+import ast
+import math
+
+import numpy as np
+
+from expr_compiler import MATH_CONSTANTS, PARAMS
+
+
+# 区间计算时把x范围分成的小区间数，所有小区间一次向量化计算
+PIECES = 64
+# 区间范围与采样得到的范围之比不超过此值时认为足够紧
+TIGHTNESS = 1.25
+
+# 内置函数写成与自定义函数相同的表达式，用同一套区间计算
+BUILTIN_EXPRESSIONS = {
+    "sine": "center_y + amp * math.sin(freq * math.pi * x / width * 2)",
+    "cosine": "center_y + amp * math.cos(freq * math.pi * x / width * 2)",
+    "parabola": "center_y + amp * ((x - width / 2) / (width / 2)) ** 2",
+    "linear": "center_y + 0 * x",
+}
+
+_HALF_PI = math.pi / 2
+_TWO_PI = 2 * math.pi
+
+
+class IntervalError(Exception):
+    """表达式含有不能做区间计算的运算"""
+
+
+def _restrict(a, low=-np.inf, high=np.inf):
+    """把区间限制在函数定义域内，完全落在定义域外的小区间记为NaN（无定义）"""
+    lo, hi = a
+    outside = (hi < low) | (lo > high)
+    lo = np.where(outside, np.nan, np.maximum(lo, low))
+    hi = np.where(outside, np.nan, np.minimum(hi, high))
+    return lo, hi
+
+
+def _increasing(func, low=-np.inf, high=np.inf):
+    def apply(a):
+        lo, hi = _restrict(a, low, high)
+        return func(lo), func(hi)
+    return apply
+
+
+def _decreasing(func, low=-np.inf, high=np.inf):
+    def apply(a):
+        lo, hi = _restrict(a, low, high)
+        return func(hi), func(lo)
+    return apply
+
+
+def _contains(lo, hi, phase, period):
+    """区间内是否含有 phase + k*period 形式的点"""
+    return np.floor((hi - phase) / period) >= np.ceil((lo - phase) / period)
+
+
+def _sin(a):
+    lo, hi = a
+    ends = np.sin(lo), np.sin(hi)
+    low, high = np.minimum(*ends), np.maximum(*ends)
+    high = np.where(_contains(lo, hi, _HALF_PI, _TWO_PI), 1.0, high)
+    low = np.where(_contains(lo, hi, -_HALF_PI, _TWO_PI), -1.0, low)
+    return low, high
+
+
+def _cos(a):
+    return _sin((a[0] + _HALF_PI, a[1] + _HALF_PI))
+
+
+def _tan(a):
+    lo, hi = a
+    pole = _contains(lo, hi, _HALF_PI, math.pi)
+    return np.where(pole, -np.inf, np.tan(lo)), np.where(pole, np.inf, np.tan(hi))
+
+
+def _abs(a):
+    lo, hi = a
+    low = np.where(lo > 0, lo, np.where(hi < 0, -hi, 0.0))
+    return low, np.maximum(np.abs(lo), np.abs(hi))
+
+
+def _cosh(a):
+    low, high = _abs(a)
+    return np.cosh(low), np.cosh(high)
+
+
+def _add(a, b):
+    return a[0] + b[0], a[1] + b[1]
+
+
+def _sub(a, b):
+    return a[0] - b[1], a[1] - b[0]
+
+
+def _mul(a, b):
+    undefined = np.isnan(a[0]) | np.isnan(b[0])
+    products = np.array([a[0] * b[0], a[0] * b[1], a[1] * b[0], a[1] * b[1]])
+    # 0乘无穷大按0处理
+    products[np.isnan(products)] = 0.0
+    lo, hi = products.min(axis=0), products.max(axis=0)
+    return np.where(undefined, np.nan, lo), np.where(undefined, np.nan, hi)
+
+
+def _div(a, b):
+    zero = (b[0] <= 0) & (b[1] >= 0)
+    with np.errstate(divide="ignore"):
+        inverse = (np.where(zero, -np.inf, 1 / b[1]), np.where(zero, np.inf, 1 / b[0]))
+    lo, hi = _mul(a, inverse)
+    return np.where(zero, -np.inf, lo), np.where(zero, np.inf, hi)
+
+
+def _integer_power(a, n):
+    lo, hi = a
+    if n == 0:
+        return np.ones_like(lo), np.ones_like(hi)
+    if n < 0:
+        return _div((np.ones_like(lo), np.ones_like(hi)), _integer_power(a, -n))
+    if n % 2:
+        return lo ** n, hi ** n
+    low, high = _abs(a)
+    return low ** n, high ** n
+
+
+def _pow(a, b):
+    if np.all(b[0] == b[1]) and len(np.unique(b[0])) == 1:
+        exponent = float(b[0][0])
+        if exponent.is_integer():
+            return _integer_power(a, int(exponent))
+        if np.nanmin(a[0]) < 0:
+            # 负数的小数次幂按复数实部计算，不做区间估计
+            raise IntervalError("负数的小数次幂")
+        if exponent > 0:
+            return a[0] ** exponent, a[1] ** exponent
+        with np.errstate(divide="ignore"):
+            return a[1] ** exponent, a[0] ** exponent
+    if np.nanmin(a[0]) <= 0:
+        raise IntervalError("底数可能不是正数的变量次幂")
+    # a**b = exp(b * log(a))
+    return _increasing(np.exp)(_mul(b, _increasing(np.log)(a)))
+
+
+def _mod(a, b):
+    if not (np.all(b[0] == b[1]) and len(np.unique(b[0])) == 1 and b[0][0] != 0):
+        raise IntervalError("取模的除数不是常数")
+    m = float(b[0][0])
+    k_lo, k_hi = np.floor(a[0] / m), np.floor(a[1] / m)
+    same = k_lo == k_hi
+    # 跨过周期时结果覆盖 [0, m) 或 (m, 0]
+    low, high = (0.0, m) if m > 0 else (m, 0.0)
+    if m > 0:
+        return np.where(same, a[0] - k_lo * m, low), np.where(same, a[1] - k_lo * m, high)
+    return np.where(same, a[1] - k_hi * m, low), np.where(same, a[0] - k_hi * m, high)
+
+
+def _floor_div(a, b):
+    lo, hi = _div(a, b)
+    return np.floor(lo), np.floor(hi)
+
+
+def _hypot(a, b):
+    a_low, a_high = _abs(a)
+    b_low, b_high = _abs(b)
+    return np.hypot(a_low, b_low), np.hypot(a_high, b_high)
+
+
+def _minimum(*args):
+    return np.minimum.reduce([a[0] for a in args]), np.minimum.reduce([a[1] for a in args])
+
+
+def _maximum(*args):
+    return np.maximum.reduce([a[0] for a in args]), np.maximum.reduce([a[1] for a in args])
+
+
+def _log(a, base=None):
+    result = _increasing(np.log, 0)(a)
+    return result if base is None else _div(result, _increasing(np.log, 0)(base))
+
+
+_BIN_OPS = {ast.Add: _add, ast.Sub: _sub, ast.Mult: _mul, ast.Div: _div, ast.Pow: _pow,
+            ast.Mod: _mod, ast.FloorDiv: _floor_div}
+
+# math函数和允许的内置函数 -> 区间版本
+_FUNCTIONS = {
+    "sin": _sin, "cos": _cos, "tan": _tan,
+    "asin": _increasing(np.arcsin, -1, 1), "acos": _decreasing(np.arccos, -1, 1),
+    "atan": _increasing(np.arctan),
+    "sinh": _increasing(np.sinh), "cosh": _cosh, "tanh": _increasing(np.tanh),
+    "asinh": _increasing(np.arcsinh), "acosh": _increasing(np.arccosh, 1),
+    "atanh": _increasing(np.arctanh, -1, 1),
+    "exp": _increasing(np.exp), "expm1": _increasing(np.expm1), "log": _log,
+    "log10": _increasing(np.log10, 0), "log2": _increasing(np.log2, 0),
+    "log1p": _increasing(np.log1p, -1), "sqrt": _increasing(np.sqrt, 0),
+    "pow": _pow, "hypot": _hypot, "fabs": _abs, "abs": _abs,
+    "floor": _increasing(np.floor), "ceil": _increasing(np.ceil), "trunc": _increasing(np.trunc),
+    "degrees": _increasing(np.degrees), "radians": _increasing(np.radians),
+    "min": _minimum, "max": _maximum,
+}
+
+
+class _Evaluator:
+    """在一组x小区间上同时计算表达式的取值范围，每个值是 (下界数组, 上界数组)"""
+
+    def __init__(self, lo, hi, values):
+        self.x = (lo, hi)
+        self.values = values
+
+    def constant(self, value):
+        array = np.full(len(self.x[0]), float(value))
+        return array, array
+
+    def visit(self, node):
+        if isinstance(node, ast.Constant):
+            return self.constant(node.value)
+        if isinstance(node, ast.Name):
+            if node.id == "x":
+                return self.x
+            if node.id in self.values:
+                return self.constant(self.values[node.id])
+            raise IntervalError(f"未知的名称: {node.id}")
+        if isinstance(node, ast.Attribute) and node.attr in MATH_CONSTANTS:
+            return self.constant(MATH_CONSTANTS[node.attr])
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            return _BIN_OPS[type(node.op)](self.visit(node.left), self.visit(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            lo, hi = self.visit(node.operand)
+            return (lo, hi) if isinstance(node.op, ast.UAdd) else (-hi, -lo)
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            if name not in _FUNCTIONS:
+                raise IntervalError(f"不支持的函数: {name}")
+            return _FUNCTIONS[name](*[self.visit(arg) for arg in node.args])
+        raise IntervalError(f"不支持的语法: {type(node).__name__}")
+
+
+def expression_bounds(expr, x_start, x_end, values, pieces=PIECES):
+    """表达式在 [x_start, x_end] 上的取值范围（外包围），返回 (下界, 上界)，处处无定义时返回None
+
+    expr是以x和画布参数为变量的表达式（字符串或ast节点），values给出画布参数的值。
+    范围分成pieces个小区间一次计算，小区间越多越紧。
+    """
+    if isinstance(expr, str):
+        expr = ast.parse(expr, mode="eval").body
+    edges = np.linspace(x_start, x_end, pieces + 1)
+    with np.errstate(all="ignore"):
+        lo, hi = _Evaluator(edges[:-1], edges[1:], values).visit(expr)
+    lo, hi = np.broadcast_to(lo, edges[:-1].shape), np.broadcast_to(hi, edges[:-1].shape)
+    defined = ~(np.isnan(lo) | np.isnan(hi))
+    if not defined.any():
+        return None
+    return float(lo[defined].min()), float(hi[defined].max())
+
+
+def function_bounds(func, x_start, x_end, width, center_y, amp, freq, pieces=PIECES):
+    """函数曲线Y值的范围，返回 (下界, 上界, 是否足够紧)，不能做区间计算时返回None
+
+    func是内置函数类型名或expr_compiler编译出的函数。区间范围是外包围，
+    再在小区间端点和中点处采样得到内包围；两者相差不超过TIGHTNESS倍时
+    认为足够紧，可以直接用来确定缩放。
+    """
+    if isinstance(func, str):
+        expr = BUILTIN_EXPRESSIONS.get(func)
+    else:
+        expr = getattr(func, "expr", None)
+        if getattr(func, "components", 1) != 1:
+            expr = None
+    if expr is None:
+        return None
+
+    values = dict(zip(PARAMS[1:], (width, center_y, amp, freq)))
+    try:
+        outer = expression_bounds(expr, x_start, x_end, values, pieces)
+    except (IntervalError, ArithmeticError, ValueError):
+        return None
+    if outer is None:
+        return None
+
+    xs = np.linspace(x_start, x_end, 2 * pieces + 1)
+    try:
+        with np.errstate(all="ignore"):
+            if isinstance(func, str):
+                from sampler import evaluate_builtin
+                ys = evaluate_builtin(func, xs, width, center_y, amp, freq)
+            else:
+                ys = np.asarray(func(xs, width, center_y, amp, freq), dtype=float)
+    except Exception:
+        return outer + (False,)
+    ys = ys[np.isfinite(ys)]
+    if not len(ys) or not all(math.isfinite(v) for v in outer):
+        return outer + (False,)
+    inner_span = float(ys.max() - ys.min())
+    outer_span = outer[1] - outer[0]
+    return outer + (outer_span <= TIGHTNESS * inner_span + 1e-9 * max(1.0, abs(outer[1])),)
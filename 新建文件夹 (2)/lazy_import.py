@@ -0,0 +1,40 @@
+import importlib
+import time
+
+
+# 已经执行的延迟导入：模块名 -> 导入耗时（秒，包含它依赖的模块）
+IMPORT_TIMES = {}
+# 所有声明过的延迟导入：模块名 -> LazyModule，同一模块只记录第一次声明的
+LAZY_MODULES = {}
+
+
+class LazyModule:
+    """延迟导入的模块，第一次访问属性时才真正导入
+
+    用于numpy等较重的计算后端，使程序启动时不必加载它们。
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        LAZY_MODULES.setdefault(name, self)
+
+    def load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            IMPORT_TIMES.setdefault(self._name, time.perf_counter() - start)
+            self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self):
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "已导入" if self.loaded else "未导入"
+        return f"<LazyModule {self._name} ({state})>"
@@ -0,0 +1,13 @@
+import math
+
+def lissajous(t, width, center_y, amp, freq):
+    # t: 曲线参数，第一个参数名为t表示参数方程
+    # width: 画布宽度
+    # center_y: 中心y坐标
+    # amp: 振幅
+    # freq: 频率
+    
+    # 李萨如图形：返回画布坐标 (x, y)
+    x = width / 2 + amp * math.sin(freq * t)
+    y = center_y + amp * math.sin((freq + 1) * t)
+    return x, y
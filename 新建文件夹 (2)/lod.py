@@ -0,0 +1,171 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+# 每个区块覆盖的屏幕像素数
+TILE_PIXELS = 256
+# 计算包络时每个像素的采样数
+SAMPLES_PER_PIXEL = 4
+# 缓存的区块数上限
+MAX_TILES = 512
+# 缩放级别范围，第L级的放大倍数为 2**L
+MIN_LEVEL = -6
+MAX_LEVEL = 24
+
+
+class Tile:
+    """一个区块的像素包络：每个像素内的最小值、最大值，以及最小值是否先出现"""
+
+    def __init__(self, lo, hi, lo_first):
+        self.lo = lo
+        self.hi = hi
+        self.lo_first = lo_first
+
+
+def envelope(ys, buckets):
+    """把采样值按像素分桶，计算每个桶的最小/最大值（忽略NaN，全为NaN的桶记为NaN）"""
+    ys = np.asarray(ys, dtype=float).reshape(buckets, -1)
+    finite = np.isfinite(ys)
+    lo_at = np.argmin(np.where(finite, ys, np.inf), axis=1)
+    hi_at = np.argmax(np.where(finite, ys, -np.inf), axis=1)
+    rows = np.arange(buckets)
+    empty = ~finite.any(axis=1)
+    lo = np.where(empty, np.nan, ys[rows, lo_at])
+    hi = np.where(empty, np.nan, ys[rows, hi_at])
+    return Tile(lo, hi, lo_at <= hi_at)
+
+
+def merge(left, right):
+    """由下一级（放大一倍）的两个相邻区块合成本级区块，相邻两个像素并为一个"""
+    lo = np.concatenate((left.lo, right.lo)).reshape(-1, 2)
+    hi = np.concatenate((left.hi, right.hi)).reshape(-1, 2)
+    lo_first = np.concatenate((left.lo_first, right.lo_first)).reshape(-1, 2)
+    lo_at = np.argmin(np.where(np.isnan(lo), np.inf, lo), axis=1)
+    hi_at = np.argmax(np.where(np.isnan(hi), -np.inf, hi), axis=1)
+    rows = np.arange(len(lo))
+    # 极值位于不同像素时按像素先后判断，位于同一像素时沿用该像素的顺序
+    same = lo_at == hi_at
+    order = np.where(same, lo_first[rows, lo_at], lo_at < hi_at)
+    return Tile(lo[rows, lo_at], hi[rows, hi_at], order)
+
+
+class LodView:
+    """可缩放、平移的曲线视图，背后是按缩放级别分块缓存的像素包络金字塔
+
+    每次重绘每个水平像素最多两个点；平移时复用已缓存的区块，
+    缩小时优先由已缓存的更细一级区块合并得到，不重新计算函数。
+    """
+
+    def __init__(self, evaluate, base_scale=1.0, offset=0.0, max_tiles=MAX_TILES):
+        self.evaluate = evaluate
+        self.base_scale = base_scale  # 第0级时每个x单位对应的像素数
+        self.offset = offset          # 视图左端对应的x
+        self.level = 0
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        self.evaluated = 0  # 计算过的区块数
+        self.merged = 0     # 由子区块合并得到的区块数
+
+    @property
+    def scale(self):
+        return self.base_scale * 2.0 ** self.level
+
+    def tile_xs(self, level, index):
+        """一个区块的采样点x坐标"""
+        span = TILE_PIXELS / (self.base_scale * 2.0 ** level)
+        count = TILE_PIXELS * SAMPLES_PER_PIXEL
+        return index * span + (np.arange(count) + 0.5) * (span / count)
+
+    def tile(self, level, index, compute=True):
+        """取得一个区块，必要时计算；compute为False时不计算，缺少的区块返回None"""
+        key = (level, index)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        children = [self.tiles.get((level + 1, 2 * index + k)) for k in (0, 1)]
+        if all(child is not None for child in children):
+            tile = merge(*children)
+            self.merged += 1
+        elif not compute:
+            return None
+        else:
+            tile = envelope(self.evaluate(self.tile_xs(level, index)), TILE_PIXELS)
+            self.evaluated += 1
+        self.store(key, tile)
+        return tile
+
+    def store(self, key, tile):
+        self.tiles[key] = tile
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+    def add(self, level, index, ys):
+        """保存在别处（如后台线程）按tile_xs计算出的区块"""
+        self.store((level, index), envelope(ys, TILE_PIXELS))
+        self.evaluated += 1
+
+    def tile_range(self, width):
+        """当前视图覆盖的区块下标范围"""
+        left = self.offset * self.scale
+        return range(math.floor(left / TILE_PIXELS), math.floor((left + width) / TILE_PIXELS) + 1)
+
+    def missing(self, width):
+        """当前视图中既没有缓存、也不能由子区块合并得到的区块 [(级别, 下标)]"""
+        level = self.level
+        return [(level, index) for index in self.tile_range(width)
+                if (level, index) not in self.tiles
+                and not all((level + 1, 2 * index + k) in self.tiles for k in (0, 1))]
+
+    def visible(self, width, compute=True):
+        """返回当前视图的折线 (屏幕x数组, y数组)，每个像素最多两个点，无定义的像素为NaN
+
+        compute为False时不计算缺少的区块，这些像素暂时也为NaN。
+        """
+        left = self.offset * self.scale
+        indices = self.tile_range(width)
+        first = indices[0]
+        blank = Tile(np.full(TILE_PIXELS, np.nan), np.full(TILE_PIXELS, np.nan),
+                     np.ones(TILE_PIXELS, dtype=bool))
+        tiles = [self.tile(self.level, index, compute) or blank for index in indices]
+        lo = np.concatenate([t.lo for t in tiles])
+        hi = np.concatenate([t.hi for t in tiles])
+        lo_first = np.concatenate([t.lo_first for t in tiles])
+
+        # 裁剪到画布范围（两侧各多留一个像素保证曲线连到边缘）
+        px = first * TILE_PIXELS + np.arange(len(lo)) + 0.5 - left
+        inside = (px >= -1) & (px <= width + 1)
+        px, lo, hi, lo_first = px[inside], lo[inside], hi[inside], lo_first[inside]
+
+        # 每个像素按极值出现的先后输出两个点
+        xs = np.repeat(px, 2)
+        ys = np.empty(len(xs))
+        ys[0::2] = np.where(lo_first, lo, hi)
+        ys[1::2] = np.where(lo_first, hi, lo)
+        return xs, ys
+
+    def zoom(self, steps, anchor):
+        """以屏幕x坐标anchor为中心缩放steps级（正数放大），返回级别是否改变"""
+        level = min(MAX_LEVEL, max(MIN_LEVEL, self.level + steps))
+        if level == self.level:
+            return False
+        x_anchor = self.offset + anchor / self.scale
+        self.level = level
+        self.offset = x_anchor - anchor / self.scale
+        return True
+
+    def resize(self, base_scale):
+        """画布宽度改变时更新第0级的比例，视图左端位置不变
+
+        已缓存的区块是按旧的像素网格计算的，比例变化时全部丢弃。
+        """
+        if base_scale != self.base_scale:
+            self.base_scale = base_scale
+            self.tiles.clear()
+
+    def pan(self, dx):
+        """按屏幕像素平移视图"""
+        self.offset -= dx / self.scale
@@ -1,6 +1,64 @@
+import time
+
+# 启动计时的起点（--profile-startup）
+_START_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk
 import math
+import os
+import sys
+import traceback
+
+from lazy_import import IMPORT_TIMES, LAZY_MODULES, LazyModule
+from scheduler import FrameScheduler
+from curve_cache import CurveCache
+from strokes import StrokeStore, rdp_simplify
+from func_index import ENGINE_MODULES, FunctionIndex, is_engine_module, split_name
+from perf import PerfMonitor
+
+# 较重的计算后端（numpy及依赖它的模块）在第一次绘图时才导入
+np = LazyModule("numpy")
+sampler = LazyModule("sampler")
+renderer = LazyModule("renderer")
+func_loader = LazyModule("func_loader")
+worker = LazyModule("worker")
+lod = LazyModule("lod")
+analysis = LazyModule("analysis")
+interval = LazyModule("interval")
+sample_cache = LazyModule("sample_cache")
+
+# 检查函数文件变化的间隔（毫秒）
+FUNCTION_WATCH_MS = 1000
+# 函数缓存至少保留的文件数，函数文件更多时按索引中的文件数扩大
+FUNCTION_CACHE_ENTRIES = 32
+
+# 边算边画时按已返回数据缩放，超出范围后重新缩放并在两侧多留的余量（占范围的比例）
+STREAM_MARGIN = 0.25
+
+# 实时预览：停止输入多久（毫秒）后编译编辑器中的代码
+PREVIEW_DELAY_MS = 300
+# 试算时这些错误说明代码本身有问题，在编辑器中标出所在行（数学定义域错误只是某些点无定义）
+CODE_ERRORS = (NameError, TypeError, AttributeError, ImportError, UnboundLocalError)
+
+# 计算耗时超过此值（毫秒）的自定义函数曲线保存到磁盘缓存
+SAMPLE_CACHE_MIN_MS = 50
+
+# 每类分析结果（交点、极大值、极小值）最多标记的点数
+ANALYSIS_MARKERS = 200
+
+# 性能信息的刷新间隔（毫秒）
+PERF_OVERLAY_MS = 500
+
+# 启动时间预算（毫秒）：从main.py开始执行到窗口第一次绘制完成
+STARTUP_BUDGET_MS = 300
+
+# 动画时长选项（秒），None表示尽快完成
+ANIMATION_DURATIONS = {"尽快": None, "1秒": 1, "3秒": 3, "5秒": 5}
+
+# 叠加绘制时各曲线的颜色，按顺序循环使用
+OVERLAY_COLORS = ("green", "blue", "red", "orange", "purple", "brown", "magenta",
+                  "dark cyan", "gold", "gray")
 
 
 class DrawingApp:
@@ -15,6 +73,7 @@ class DrawingApp:
         self.auto_function = None
         self.last_x = None
         self.last_y = None
+        self.scheduler = None
 
         # 滑动值计算
         self.slide_distance = 0.0
@@ -26,9 +85,96 @@ class DrawingApp:
         self.canvas_width = 700
         self.canvas_height = 500
 
+        # 自定义函数加载缓存和后台计算，第一次用到时才创建（需要导入numpy）
+        self._function_cache = None
+        self._eval_worker = None
+        self._sample_cache = None
+        self.eval_after_id = None
+        # 后台计算时边算边画的状态
+        self.stream_state = None
+        # 实时预览：(函数名称, 内存中编译出的函数, 版本)
+        self.preview_func = None
+        self.preview_after_id = None
+
+        # 采样结果缓存，拖动滑块时无需重新计算
+        self.curve_cache = CurveCache()
+        self.live_after_id = None
+        # 滑块变化时重绘的方式："auto"、"overlay"，没有曲线时为None
+        self.live_mode = None
+
+        # 最近一次绘制的曲线（数据空间的采样点），画布大小改变时据此重新投影
+        self.plot_state = None
+        self.pending_size = None
+        self.resize_after_id = None
+
+        # 函数文件索引，定时检查目录变化
+        self.function_index = FunctionIndex(exclude=ENGINE_MODULES)
+        self.index_after_id = None
+
+        # 缩放/平移视图：求值函数、分块包络视图和平移起点
+        self.plot_evaluate = None
+        # plot_evaluate能否在GUI线程中直接调用（内置函数和编译后的表达式）
+        self.plot_vectorized = True
+        # 慢函数在后台计算区块所需的 (函数, 文件路径, 函数名, 宽度, 中心Y, 振幅, 频率)
+        # 和正在计算的区块 {(级别, 下标): 在任务中的起止下标}
+        self.plot_source = None
+        self.lod_pending = None
+        self.lod_view = None
+        self.lod_transform = None
+        self.pan_x = None
+
+        # 曲线分析结果（交点、极值、弧长）和函数曲线的Y方向投影 (缩放比例, 偏移量)
+        self.analysis = None
+        self.plot_transform = None
+        # 分析结果所用的投影 (每个x单位的像素数, Y缩放比例, Y偏移量)，缩放视图据此换算标记位置
+        self.analysis_transform = None
+
+        # 栅格图层使用的PhotoImage，按标签复用并保持引用
+        self.raster_images = {}
+
+        # 帮助窗口
+        self.help_window = None
+
+        # 热点路径的计时和计数，可以显示在画布右上角
+        self.perf = PerfMonitor()
+        self.perf_after_id = None
+        self.eval_started = None
+
+        # 叠加绘制的曲线数据和每条曲线的显示开关
+        self.overlay_state = None
+        self.overlay_vars = {}
+        self.overlay_checks = []
+
+        # 手动笔迹存储，当前笔画对应的折线对象
+        self.stroke_store = StrokeStore(self.canvas_width, self.canvas_height)
+        self.stroke_item = None
+        self.stroke_flush_id = None
+
         self.setup_ui()
         self.populate_file_combobox()
 
+    @property
+    def function_cache(self):
+        if self._function_cache is None:
+            self._function_cache = func_loader.FunctionCache(max_entries=self.function_cache_size())
+        return self._function_cache
+
+    def function_cache_size(self):
+        """函数缓存的容量：能放下索引中的全部函数文件，叠加绘制时不会互相挤出"""
+        return max(FUNCTION_CACHE_ENTRIES, len(self.function_index.files))
+
+    @property
+    def eval_worker(self):
+        if self._eval_worker is None:
+            self._eval_worker = worker.EvalWorker()
+        return self._eval_worker
+
+    @property
+    def sample_cache(self):
+        if self._sample_cache is None:
+            self._sample_cache = sample_cache.SampleCache()
+        return self._sample_cache
+
     def setup_ui(self):
         # 主框架
         main_frame = ttk.Frame(self.root)
@@ -51,6 +197,8 @@ class DrawingApp:
         ttk.Label(custom_panel, text="函数代码:").pack(pady=2, padx=5, anchor=tk.NW)
         self.custom_code_text = tk.Text(custom_panel, height=15, width=28, font=("Consolas", 9))
         self.custom_code_text.pack(pady=2, padx=5, fill=tk.BOTH, expand=True, anchor=tk.NW)
+        self.custom_code_text.tag_configure("code_error", background="#ffd6d6")
+        self.custom_code_text.bind("<<Modified>>", self.on_code_modified)
         # 使用函数名称框中的内容作为函数名
         func_name = self.custom_func_name_var.get()
         self.custom_code_text.insert("1.0", 
@@ -68,6 +216,13 @@ class DrawingApp:
         ttk.Button(button_frame, text="保存函数", command=self.save_custom_function).pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
         ttk.Button(button_frame, text="清除内容", command=self.clear_custom_function).pack(side=tk.RIGHT, padx=2, fill=tk.X, expand=True)
 
+        # 实时预览：编辑时在内存中编译并重绘，保存前不写文件
+        self.live_preview_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(custom_panel, text="实时预览（不保存）", variable=self.live_preview_var,
+                        command=self.toggle_live_preview).pack(side=tk.BOTTOM, anchor=tk.W, padx=5)
+        self.code_error_label = ttk.Label(custom_panel, text="", foreground="red", wraplength=220)
+        self.code_error_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
+
         # ========== 左侧控制面板 ==========
         control_frame = ttk.LabelFrame(main_frame, text="控制面板", width=180)
         control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
@@ -82,6 +237,19 @@ class DrawingApp:
 
         ttk.Button(slide_frame, text="重置滑动值", command=self.reset_slide).pack(pady=2)
 
+        simplify_frame = ttk.Frame(slide_frame)
+        simplify_frame.pack(pady=2)
+        ttk.Label(simplify_frame, text="笔迹简化(像素):").pack(side=tk.LEFT)
+        self.simplify_var = tk.DoubleVar(value=0.5)
+        ttk.Spinbox(simplify_frame, from_=0, to=5, increment=0.5, width=4,
+                    textvariable=self.simplify_var).pack(side=tk.LEFT)
+
+        stroke_btn_frame = ttk.Frame(slide_frame)
+        stroke_btn_frame.pack(fill=tk.X, pady=2)
+        ttk.Button(stroke_btn_frame, text="保存", width=5, command=self.save_strokes).pack(side=tk.LEFT, expand=True)
+        ttk.Button(stroke_btn_frame, text="加载", width=5, command=self.load_strokes).pack(side=tk.LEFT, expand=True)
+        ttk.Button(stroke_btn_frame, text="回放", width=5, command=self.replay_strokes).pack(side=tk.LEFT, expand=True)
+
         # --- Y值限制设置 ---
         y_frame = ttk.LabelFrame(control_frame, text="Y值上限设定")
         y_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -95,6 +263,12 @@ class DrawingApp:
         self.y_limit_label = ttk.Label(y_frame, text=f"当前上限: {self.y_limit}")
         self.y_limit_label.pack(pady=2)
 
+        self.analysis_marks_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(y_frame, text="标记交点和极值", variable=self.analysis_marks_var,
+                        command=self.draw_analysis).pack(anchor=tk.W, padx=5)
+        self.analysis_label = ttk.Label(y_frame, text="", justify=tk.LEFT)
+        self.analysis_label.pack(pady=2, padx=5, anchor=tk.W)
+
         # --- 自动画线函数设置 ---
         func_frame = ttk.LabelFrame(control_frame, text="自动画线函数")
         func_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -110,12 +284,40 @@ class DrawingApp:
         ttk.Label(func_frame, text="振幅:").pack(pady=2)
         self.amplitude_var = tk.DoubleVar(value=100)
         ttk.Scale(func_frame, from_=10, to=200, variable=self.amplitude_var,
-                  orient=tk.HORIZONTAL).pack(fill=tk.X, padx=5)
+                  orient=tk.HORIZONTAL, command=self.on_param_change).pack(fill=tk.X, padx=5)
 
         ttk.Label(func_frame, text="频率:").pack(pady=2)
         self.frequency_var = tk.DoubleVar(value=2)
         ttk.Scale(func_frame, from_=0.5, to=10, variable=self.frequency_var,
-                  orient=tk.HORIZONTAL).pack(fill=tk.X, padx=5)
+                  orient=tk.HORIZONTAL, command=self.on_param_change).pack(fill=tk.X, padx=5)
+
+        self.live_redraw_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(func_frame, text="拖动时实时重绘",
+                        variable=self.live_redraw_var).pack(anchor=tk.W, padx=10)
+
+        ttk.Label(func_frame, text="绘制模式:").pack(pady=2)
+        self.render_mode = tk.StringVar(value="progressive")
+        for text, value in [("逐步绘制", "progressive"), ("立即绘制", "instant")]:
+            ttk.Radiobutton(func_frame, text=text, value=value,
+                            variable=self.render_mode).pack(anchor=tk.W, padx=10)
+
+        ttk.Label(func_frame, text="动画时长:").pack(pady=2)
+        self.duration_var = tk.StringVar(value="3秒")
+        ttk.Combobox(func_frame, textvariable=self.duration_var, state="readonly", width=8,
+                     values=list(ANIMATION_DURATIONS)).pack(pady=2)
+
+        # 高级选项（后台计算、采样方式）不常用，第一次展开时才创建控件
+        self.eval_mode = tk.StringVar(value="thread")
+        self.sampling_mode = tk.StringVar(value="fixed")
+        self.tolerance_var = tk.DoubleVar(value=0.5)
+        self.turns_var = tk.DoubleVar(value=4)
+        self.perf_overlay_var = tk.BooleanVar(value=False)
+        self.disk_cache_var = tk.BooleanVar(value=True)
+        self.func_frame = func_frame
+        self.advanced_frame = None
+        self.advanced_visible = False
+        self.advanced_btn = ttk.Button(func_frame, text="高级选项 ▸", command=self.toggle_advanced)
+        self.advanced_btn.pack(fill=tk.X, padx=5, pady=2)
 
         # --- 操作按钮 ---
         btn_frame = ttk.Frame(control_frame)
@@ -129,6 +331,9 @@ class DrawingApp:
         self.auto_btn = ttk.Button(btn_frame, text="自动按钮", command=self.auto_draw)
         self.auto_btn.pack(fill=tk.X, pady=3)
 
+        # 叠加绘制按钮
+        ttk.Button(btn_frame, text="叠加绘制", command=self.overlay_draw).pack(fill=tk.X, pady=3)
+
         # 停止按钮
         self.stop_btn = ttk.Button(btn_frame, text="停止绘画", command=self.stop_drawing)
         self.stop_btn.pack(fill=tk.X, pady=3)
@@ -136,6 +341,10 @@ class DrawingApp:
         # 帮助按钮
         ttk.Button(btn_frame, text="帮助", command=self.show_help).pack(fill=tk.X, pady=3)
 
+        # 叠加曲线开关，第一次叠加绘制时才创建
+        self.control_frame = control_frame
+        self.overlay_frame = None
+
         # ========== 右侧画布区域 ==========
         canvas_frame = ttk.Frame(main_frame)
         canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -154,11 +363,57 @@ class DrawingApp:
         self.canvas.bind("<ButtonRelease-1>", self.stop_draw)
         self.canvas.bind("<Configure>", self.on_canvas_resize)
 
+        # 滚轮缩放（Windows/macOS 用 MouseWheel，X11 用 Button-4/5），右键拖动平移
+        self.canvas.bind("<MouseWheel>", self.on_zoom)
+        self.canvas.bind("<Button-4>", self.on_zoom)
+        self.canvas.bind("<Button-5>", self.on_zoom)
+        self.canvas.bind("<Button-3>", self.start_pan)
+        self.canvas.bind("<B3-Motion>", self.pan)
+
         # ========== 底部状态栏 ==========
-        self.status_bar = ttk.Label(self.root, text="就绪 | 点击并拖动鼠标开始绘制",
+        self.status_bar = ttk.Label(self.root, text="就绪 | 点击并拖动鼠标开始绘制，滚轮缩放、右键拖动平移曲线",
                                     relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
+    def toggle_advanced(self):
+        """展开或收起高级选项"""
+        if self.advanced_frame is None:
+            frame = self.advanced_frame = ttk.Frame(self.func_frame)
+
+            ttk.Label(frame, text="后台计算:").pack(pady=2)
+            for text, value in [("线程", "thread"), ("进程", "process")]:
+                ttk.Radiobutton(frame, text=text, value=value,
+                                variable=self.eval_mode).pack(anchor=tk.W, padx=10)
+
+            ttk.Label(frame, text="采样方式:").pack(pady=2)
+            for text, value in [("固定步长", "fixed"), ("自适应", "adaptive")]:
+                ttk.Radiobutton(frame, text=text, value=value,
+                                variable=self.sampling_mode).pack(anchor=tk.W, padx=10)
+            tolerance_frame = ttk.Frame(frame)
+            tolerance_frame.pack(pady=2)
+            ttk.Label(tolerance_frame, text="容差(像素):").pack(side=tk.LEFT)
+            ttk.Spinbox(tolerance_frame, from_=0.1, to=5, increment=0.1, width=5,
+                        textvariable=self.tolerance_var).pack(side=tk.LEFT)
+            turns_frame = ttk.Frame(frame)
+            turns_frame.pack(pady=2)
+            ttk.Label(turns_frame, text="曲线圈数(t/θ):").pack(side=tk.LEFT)
+            ttk.Spinbox(turns_frame, from_=0.5, to=50, increment=0.5, width=5,
+                        textvariable=self.turns_var).pack(side=tk.LEFT)
+
+            ttk.Checkbutton(frame, text="磁盘缓存慢函数", variable=self.disk_cache_var).pack(anchor=tk.W, padx=10)
+            ttk.Button(frame, text="清除磁盘缓存", command=self.clear_sample_cache).pack(fill=tk.X, padx=5, pady=2)
+            ttk.Checkbutton(frame, text="显示性能信息", variable=self.perf_overlay_var,
+                            command=self.toggle_perf_overlay).pack(anchor=tk.W, padx=10)
+            ttk.Button(frame, text="导出性能数据", command=self.export_perf).pack(fill=tk.X, padx=5, pady=2)
+
+        self.advanced_visible = not self.advanced_visible
+        if self.advanced_visible:
+            self.advanced_frame.pack(fill=tk.X, after=self.advanced_btn)
+            self.advanced_btn.config(text="高级选项 ▾")
+        else:
+            self.advanced_frame.pack_forget()
+            self.advanced_btn.config(text="高级选项 ▸")
+
     def draw_y_limit_line(self):
         """绘制Y值限制线"""
         self.canvas.delete("y_limit_line")
@@ -168,16 +423,171 @@ class DrawingApp:
                                 anchor=tk.W, fill="red", tags="y_limit_line")
 
     def on_canvas_resize(self, event):
-        """画布大小改变时更新"""
-        self.canvas_width = event.width
-        self.canvas_height = event.height
+        """画布大小改变时更新，拖动窗口边缘产生的连续事件合并为一次"""
+        self.pending_size = (event.width, event.height)
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(120, self.apply_resize)
+
+    def apply_resize(self):
+        """按新的画布尺寸缩放已有内容，不重新计算函数"""
+        self.resize_after_id = None
+        old_width, old_height = self.canvas_width, self.canvas_height
+        new_width, new_height = self.pending_size
+        if (new_width, new_height) == (old_width, old_height):
+            return
+        self.canvas_width = new_width
+        self.canvas_height = new_height
         self.draw_y_limit_line()
 
+        # 手动笔迹：一次canvas.scale缩放所有对象
+        if old_width and old_height:
+            self.canvas.scale("manual_draw", 0, 0, new_width / old_width, new_height / old_height)
+        self.stroke_store.rescale_to(new_width, new_height)
+
+        # 自动曲线：用缓存的采样点重新投影，缩放视图按新尺寸重新计算投影后重绘
+        if self.lod_view is not None:
+            self.fit_lod()
+            self.draw_lod()
+        elif self.plot_state is not None:
+            self.reproject_curve()
+        if self.overlay_state is not None:
+            self.draw_overlay_curves()
+
+    def reproject_curve(self):
+        """把最近一次的曲线按当前画布尺寸重新投影并立即画出"""
+        state = self.plot_state
+        if self.scheduler:
+            # 动画进行中时直接画完
+            self.cancel_animation()
+            self.is_auto_drawing = False
+            self.report_done()
+        xs = state["xs"]
+        if state["kind"] == "function":
+            xs = xs * (self.canvas_width / state["width"])
+        self.canvas.delete("auto_draw")
+        xs, points_y, breaks = self.project_samples(xs, state["ys"], self.canvas_height,
+                                                    state["center_y"], state["kind"], state["limits"])
+        self.make_renderer(xs, points_y, "auto_draw", breaks, fill="green", width=2).draw_all()
+        self.analyze_curve(xs, points_y, breaks)
+        self.draw_analysis()
+
+    def on_zoom(self, event):
+        """滚轮缩放曲线，以鼠标位置为中心，每格放大或缩小一倍"""
+        if not self.ensure_lod():
+            return
+        steps = 1 if event.num == 4 or getattr(event, "delta", 0) > 0 else -1
+        if self.lod_view.zoom(steps, event.x):
+            self.draw_lod()
+
+    def start_pan(self, event):
+        self.pan_x = event.x
+
+    def pan(self, event):
+        """右键拖动平移曲线，复用已缓存的区块"""
+        if self.pan_x is None or not self.ensure_lod():
+            return
+        self.lod_view.pan(event.x - self.pan_x)
+        self.pan_x = event.x
+        self.draw_lod()
+
+    def ensure_lod(self):
+        """第一次缩放或平移时建立分块视图，Y方向沿用当前曲线的缩放"""
+        if self.lod_view is not None:
+            return True
+        state = self.plot_state
+        if state is None or self.plot_evaluate is None:
+            return False
+        if self.scheduler:
+            # 动画进行中时直接结束
+            self.cancel_animation()
+            self.is_auto_drawing = False
+        self.lod_view = lod.LodView(self.plot_evaluate)
+        self.fit_lod()
+        return True
+
+    def fit_lod(self):
+        """按当前画布尺寸设置缩放视图的X比例和Y方向投影"""
+        state = self.plot_state
+        self.lod_transform = sampler.compute_scale(state["ys"], self.canvas_height, state["center_y"],
+                                                   state["limits"])
+        old_scale = self.lod_view.base_scale
+        self.lod_view.resize(self.canvas_width / state["width"])
+        if self.lod_view.base_scale != old_scale and self.lod_pending is not None:
+            # 正在计算的区块是按旧比例取的点
+            self.cancel_animation()
+            self.lod_pending = None
+
+    def draw_lod(self):
+        """按当前缩放级别和平移位置重绘曲线，每个像素最多两个点
+
+        慢的自定义函数缺少的区块交给后台计算，先画出已有部分，算完后再重绘。
+        """
+        if not self.plot_vectorized:
+            self.request_tiles()
+        xs, ys = self.lod_view.visible(self.canvas_width, compute=self.plot_vectorized)
+        scale_factor, offset_y = self.lod_transform
+        xs, points_y, breaks = renderer.prepare_points(xs, ys * scale_factor + offset_y, self.canvas_height)
+        self.canvas.delete("auto_draw")
+        with self.perf.timer("canvas"):
+            renderer.PolylineRenderer(self.canvas, renderer.flatten_points(xs, points_y), "auto_draw",
+                                      breaks=breaks, fill="green", width=2).draw_all()
+        self.perf.count("frame")
+        self.perf.count("points", len(xs))
+        view = self.lod_view
+        pending = f"，计算中 {len(self.lod_pending)}" if self.lod_pending else ""
+        self.status_bar.config(text=f"缩放: {2.0 ** view.level:g}倍 | 视图起点 x={view.offset:.2f} | "
+                                    f"计算区块 {view.evaluated}，合并区块 {view.merged}{pending}")
+        # 重绘删掉了分析标记，按新的视图重新标出
+        self.draw_analysis()
+
+    def request_tiles(self):
+        """把当前视图缺少的区块一次提交给后台计算，已在计算中的不重复提交"""
+        missing = self.lod_view.missing(self.canvas_width)
+        if not missing or (self.lod_pending is not None and set(missing) <= self.lod_pending.keys()):
+            return
+        func, file_path, func_name, width, center_y, amp, freq = self.plot_source
+        pending = {}
+        chunks = []
+        start = 0
+        for key in missing:
+            xs = self.lod_view.tile_xs(*key)
+            pending[key] = (start, start + len(xs))
+            chunks.append(xs)
+            start += len(xs)
+        if self.eval_after_id is not None:
+            self.root.after_cancel(self.eval_after_id)
+        job = self.eval_worker.submit(func, np.concatenate(chunks), width, center_y, amp, freq,
+                                      file_path=file_path, func_name=func_name)
+        self.lod_pending = pending
+        self.eval_after_id = self.root.after(15, self.poll_tiles, job)
+
+    def poll_tiles(self, job):
+        """取回后台计算完的区块，有新区块时重绘"""
+        self.eval_after_id = None
+        if self.eval_worker.poll() is not job or self.lod_view is None:
+            self.lod_pending = None
+            return
+        added = False
+        for key, (start, end) in list(self.lod_pending.items()):
+            if job.filled[start // worker.CHUNK_SIZE:-(-end // worker.CHUNK_SIZE)].all():
+                self.lod_view.add(*key, job.ys[start:end])
+                del self.lod_pending[key]
+                added = True
+        if job.finished:
+            self.eval_worker.job = None
+            self.lod_pending = None
+        else:
+            self.eval_after_id = self.root.after(15, self.poll_tiles, job)
+        if added or job.finished:
+            self.draw_lod()
+
     def update_y_limit(self):
         """更新Y值上限"""
         self.y_limit = self.y_limit_var.get()
         self.y_limit_label.config(text=f"当前上限: {self.y_limit}")
         self.draw_y_limit_line()
+        self.draw_analysis()
 
     def start_draw(self, event):
         """开始手动绘制"""
@@ -188,34 +598,117 @@ class DrawingApp:
         self.last_x = event.x
         self.last_y = event.y
 
+        # 每一笔只用一个折线对象
+        self.stroke_store.begin(event.x, event.y)
+        self.stroke_item = None
+
     def draw(self, event):
-        """手动绘制过程，计算滑动值"""
+        """手动绘制过程，计算滑动值
+
+        鼠标移动事件只缓冲坐标点，画布和标签每帧最多更新一次。
+        """
         if not self.is_drawing:
             return
 
         # 计算滑动距离
         if self.last_x is not None and self.last_y is not None:
-            distance = math.sqrt((event.x - self.last_x) ** 2 + (event.y - self.last_y) ** 2)
-            self.slide_distance += distance
-            self.slide_label.config(text=f"滑动距离: {self.slide_distance:.2f}")
-
-        # 绘制线条
-        self.canvas.create_line(self.last_x, self.last_y, event.x, event.y,
-                                fill="blue", width=2, tags="manual_draw")
+            self.slide_distance += math.hypot(event.x - self.last_x, event.y - self.last_y)
 
+        self.stroke_store.add(event.x, event.y)
         self.last_x = event.x
         self.last_y = event.y
 
-        # 更新状态栏
-        self.status_bar.config(text=f"绘制中 | 坐标: ({event.x}, {event.y}) | 滑动值: {self.slide_distance:.2f}")
+        if self.stroke_flush_id is None:
+            self.stroke_flush_id = self.root.after(16, self.flush_stroke)
+
+    def flush_stroke(self):
+        """把缓冲的点画到当前笔画的折线上，并更新标签"""
+        self.stroke_flush_id = None
+        stroke = self.stroke_store.current
+        if stroke is not None and len(stroke) >= 2:
+            if self.stroke_item is None:
+                self.stroke_item = self.canvas.create_line(stroke.coords(), fill="blue",
+                                                           width=2, tags="manual_draw")
+            else:
+                self.canvas.coords(self.stroke_item, stroke.coords())
+            self.perf.count("canvas_calls")
+
+        self.slide_label.config(text=f"滑动距离: {self.slide_distance:.2f}")
+        self.perf.count("label")
+        if self.is_drawing:
+            # 更新状态栏
+            self.status_bar.config(text=f"绘制中 | 坐标: ({self.last_x}, {self.last_y}) | 滑动值: {self.slide_distance:.2f}")
+
+    def cancel_stroke_flush(self):
+        """取消尚未执行的笔画刷新"""
+        if self.stroke_flush_id is not None:
+            self.root.after_cancel(self.stroke_flush_id)
+            self.stroke_flush_id = None
 
     def stop_draw(self, event=None):
         """停止手动绘制"""
+        if self.is_drawing:
+            self.cancel_stroke_flush()
+            self.flush_stroke()
+            self.simplify_stroke()
+            self.stroke_store.end()
         self.is_drawing = False
         self.last_x = None
         self.last_y = None
         self.status_bar.config(text=f"绘制结束 | 总滑动值: {self.slide_distance:.2f}")
 
+    def simplify_stroke(self):
+        """笔画结束后用RDP算法去掉多余的点"""
+        try:
+            tolerance = float(self.simplify_var.get())
+        except (tk.TclError, ValueError):
+            tolerance = 0
+        stroke = self.stroke_store.current
+        if tolerance <= 0 or self.stroke_item is None or stroke is None or len(stroke) < 3:
+            return
+        points = np.frombuffer(stroke.points, dtype=np.float32).reshape(-1, 2)
+        stroke.keep(rdp_simplify(points[:, 0], points[:, 1], tolerance))
+        self.canvas.coords(self.stroke_item, stroke.coords())
+
+    def save_strokes(self):
+        """把手动笔迹保存为二进制文件"""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(defaultextension=".strokes",
+                                            filetypes=[("笔迹文件", "*.strokes")])
+        if not path:
+            return
+        try:
+            self.stroke_store.save(path)
+            self.status_bar.config(text=f"已保存 {len(self.stroke_store.strokes)} 笔、"
+                                        f"{self.stroke_store.point_count} 个点到 {path}")
+        except Exception as e:
+            self.status_bar.config(text=f"保存笔迹失败: {str(e)}")
+
+    def load_strokes(self):
+        """加载笔迹文件并画到当前画布上"""
+        from tkinter import filedialog
+        path = filedialog.askopenfilename(filetypes=[("笔迹文件", "*.strokes")])
+        if not path:
+            return
+        try:
+            store = StrokeStore.load(path)
+        except Exception as e:
+            self.status_bar.config(text=f"加载笔迹失败: {str(e)}")
+            return
+        self.stop_draw()
+        store.rescale_to(self.canvas_width, self.canvas_height)
+        self.stroke_store = store
+        self.replay_strokes()
+
+    def replay_strokes(self):
+        """按当前画布尺寸重新绘制所有笔迹"""
+        self.canvas.delete("manual_draw")
+        self.stroke_item = None
+        items = self.stroke_store.replay(self.canvas, self.canvas_width, self.canvas_height,
+                                         fill="blue", width=2)
+        self.status_bar.config(text=f"已回放 {len(items)} 笔 | "
+                                    f"共 {self.stroke_store.point_count} 个点，{self.stroke_store.nbytes} 字节")
+
     def reset_slide(self):
         """重置滑动值"""
         self.slide_distance = 0.0
@@ -226,12 +719,27 @@ class DrawingApp:
         # 中断所有绘画
         self.is_drawing = False
         self.is_auto_drawing = False
+        self.live_mode = None
+        self.cancel_animation()
+        self.cancel_stroke_flush()
+        self.stroke_store.clear()
+        self.stroke_item = None
         self.last_x = None
         self.last_y = None
 
         # 清除画板上的所有绘制内容（保留Y限制线）
         self.canvas.delete("manual_draw")
         self.canvas.delete("auto_draw")
+        self.plot_state = None
+        self.analysis = None
+        self.analysis_transform = None
+        self.analysis_label.config(text="")
+        self.plot_evaluate = None
+        self.plot_source = None
+        self.lod_pending = None
+        self.lod_view = None
+        self.overlay_state = None
+        self.build_overlay_legend([])
 
         # 重置滑动值
         self.slide_distance = 0.0
@@ -239,13 +747,35 @@ class DrawingApp:
 
         self.status_bar.config(text="画板已清除")
 
-    def auto_draw(self):
+    def on_param_change(self, value=None):
+        """拖动振幅/频率滑块时，合并同一帧内的多次变化后实时重绘"""
+        if not self.live_redraw_var.get():
+            return
+        # 曲线已经画出或仍在计算中（后台计算时plot_state还是None）都要重绘，
+        # 否则计算期间拖动滑块的变化会丢失
+        if self.plot_state is None and self.overlay_state is None and not self.is_auto_drawing:
+            return
+        if self.live_mode is None:
+            return
+        if self.live_after_id is None:
+            self.live_after_id = self.root.after(30, self.redraw_live)
+
+    def redraw_live(self):
+        """用当前参数立即重绘曲线（优先使用缓存）"""
+        self.live_after_id = None
+        if self.live_mode == "overlay":
+            self.overlay_draw()
+        else:
+            self.auto_draw(instant=True)
+
+    def auto_draw(self, instant=False):
         """自动按钮：中断并清除绘画，然后调用内置函数自动绘画"""
         # 先执行清除操作
         self.clear_canvas()
 
         # 开始自动绘画
         self.is_auto_drawing = True
+        self.live_mode = "auto"
         self.status_bar.config(text="自动绘画中...")
 
         # 根据选择的函数类型绘制
@@ -261,47 +791,31 @@ class DrawingApp:
         # 加载自定义函数
         custom_func = None
         if func_type == "custom":
-            func_name = self.custom_func_name_var.get().strip()
-            if not func_name:
+            name = self.custom_func_name_var.get().strip()
+            if not name:
                 self.status_bar.config(text="错误: 请先设置自定义函数名称")
                 self.is_auto_drawing = False
                 return
             
+            file_path, func_name = split_name(name)
+            # 实时预览打开时使用编辑器中的代码在内存中编译出的函数，不读文件
+            preview = self.preview_func if self.live_preview_var.get() else None
+            if preview is not None and preview[0] != name:
+                preview = None
             try:
-                import importlib.util
-                import os
-                
-                # 检查文件是否存在
-                file_path = f"{func_name}.py"
-                if not os.path.exists(file_path):
-                    self.status_bar.config(text=f"错误: 文件 '{file_path}' 不存在")
-                    self.is_auto_drawing = False
-                    return
-                
-                # 加载模块
-                spec = importlib.util.spec_from_file_location(func_name, file_path)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    
-                    # 检查模块中是否有对应的函数
-                    if hasattr(module, func_name):
-                        custom_func = getattr(module, func_name)
-                        self.status_bar.config(text=f"成功加载函数 '{func_name}'")
-                    else:
-                        # 列出模块中所有可用的函数
-                        available_funcs = [name for name in dir(module) if not name.startswith('_')]
-                        func_list = ', '.join(available_funcs)
-                        self.status_bar.config(text=f"错误: 文件中未找到函数 '{func_name}'，可用函数: {func_list}")
-                        self.is_auto_drawing = False
-                        return
+                if preview is not None:
+                    _, custom_func, version = preview
                 else:
-                    self.status_bar.config(text=f"错误: 无法加载文件 '{file_path}'")
-                    self.is_auto_drawing = False
-                    return
-                    
+                    # 从缓存加载，文件未变化时不会重新读取和编译
+                    with self.perf.timer("load"):
+                        custom_func = self.function_cache.load(file_path, func_name)
+                    version = self.function_cache.version(file_path)
+                self.status_bar.config(text=f"成功加载函数 '{func_name}'")
+            except func_loader.LoadError as e:
+                self.status_bar.config(text=f"错误: {e}")
+                self.is_auto_drawing = False
+                return
             except Exception as e:
-                import traceback
                 error_detail = traceback.format_exc()
                 self.status_bar.config(text=f"加载失败: {str(e)}")
                 print(f"详细错误信息:\n{error_detail}")
@@ -311,112 +825,591 @@ class DrawingApp:
         # 初始中心Y坐标
         center_y = canvas_height / 2
 
-        # 计算函数的Y值范围，用于自动缩放
-        def calculate_y_value(x_val):
-            if func_type == "sine":
-                return center_y + amplitude * math.sin(frequency * math.pi * x_val / self.canvas_width * 2)
-            elif func_type == "cosine":
-                return center_y + amplitude * math.cos(frequency * math.pi * x_val / self.canvas_width * 2)
-            elif func_type == "parabola":
-                normalized_x = (x_val - self.canvas_width / 2) / (self.canvas_width / 2)
-                return center_y + amplitude * normalized_x ** 2
-            elif func_type == "custom" and custom_func:
-                try:
-                    # 保持原始x值，不进行归一化
-                    # 直接使用0到canvas_width的x值
-                    result = custom_func(x_val, self.canvas_width, center_y, amplitude, frequency)
-                    # 确保返回值是实数
-                    if isinstance(result, complex):
-                        # 如果是复数，取其实部
-                        result = result.real
-                    return result
-                except Exception as e:
-                    self.status_bar.config(text=f"函数计算错误: {str(e)}")
-                    return center_y
-            else:  # linear
-                return center_y
-
-        # 预计算所有点的Y值，确定范围
-        y_values = []
-        step = 2
-        test_x = x_start
-        while test_x <= x_end:
-            y = calculate_y_value(test_x)
-            y_values.append(y)
-            test_x += step
-
-        # 计算Y值范围
-        if y_values:
-            min_y = min(y_values)
-            max_y = max(y_values)
-            y_range = max(1, max_y - min_y)  # 避免除零
+        # 参数方程和极坐标曲线在参数网格上求值，不支持缩放/平移和自适应采样
+        kind = sampler.function_kind(custom_func) if custom_func else "function"
+
+        # 缩放/平移时按需计算区块所用的求值函数
+        plot_width = self.canvas_width
+        self.plot_evaluate = None
+        self.plot_vectorized = sampler.is_vectorized(custom_func)
+        if kind == "function":
+            self.plot_evaluate = lambda xs: sampler.sample_function(func_type, xs, plot_width, center_y,
+                                                                    amplitude, frequency, custom_func)[0]
+            if custom_func:
+                # 进程模式要从文件重新加载函数，预览的代码只在线程中计算
+                self.plot_source = (custom_func, None if preview is not None else file_path, func_name,
+                                    plot_width, center_y, amplitude, frequency)
+
+        adaptive = self.sampling_mode.get() == "adaptive" and kind == "function"
+        try:
+            tolerance = max(0.05, float(self.tolerance_var.get()))
+        except (tk.TclError, ValueError):
+            tolerance = 0.5
+        if kind != "function":
+            try:
+                turns = min(50.0, max(0.25, float(self.turns_var.get())))
+            except (tk.TclError, ValueError):
+                turns = sampler.CURVE_TURNS
+            sampling = (kind, turns)
         else:
-            min_y = center_y - 50
-            max_y = center_y + 50
-            y_range = 100
-
-        # 计算缩放比例，确保图像在画布内
-        # 留10%的边距
-        available_height = canvas_height * 0.9
-        scale_factor = available_height / y_range
-        if scale_factor > 1:
-            scale_factor = 1  # 不放大，只缩小
-
-        # 计算新的中心Y坐标
-        new_center_y = (min_y + max_y) / 2
-        offset_y = canvas_height / 2 - new_center_y * scale_factor
-
-        # 开始绘制
-        x = x_start
-        # 绘制起始点
-        start_y = calculate_y_value(x)
-        scaled_start_y = start_y * scale_factor + offset_y
-        self.canvas.create_oval(x - 3, scaled_start_y - 3, x + 3, scaled_start_y + 3, fill="green", tags="auto_draw")
+            sampling = ("adaptive", tolerance) if adaptive else ("fixed", 2)
+
+        # 缓存键：函数标识/版本、参数、画布尺寸和采样方式
+        # 固定步长的内置函数只缓存振幅为1的基础曲线，振幅变化时做一次仿射变换
+        base_curve = not custom_func and not adaptive
+        if custom_func:
+            source = func_loader.EDITOR_NAME if preview is not None else os.path.abspath(file_path)
+            key = (source, func_name, version, amplitude, frequency, self.canvas_width,
+                   canvas_height, sampling)
+        elif base_curve:
+            key = (func_type, frequency, self.canvas_width, sampling)
+        else:
+            key = (func_type, amplitude, frequency, self.canvas_width, canvas_height, sampling)
+
+        # 内置函数用区间算术确定Y范围，缩放时不必再扫描一遍采样值；范围不够紧时照常扫描
+        limits = None
+        if not custom_func:
+            with self.perf.timer("bounds"):
+                bounds = interval.function_bounds(func_type, x_start, x_end, self.canvas_width,
+                                                  center_y, amplitude, frequency)
+            if bounds is not None and bounds[2]:
+                limits = bounds[:2]
+
+        cached = self.curve_cache.get(key)
+        if cached is not None:
+            xs, ys = cached
+            if base_curve:
+                ys = center_y + amplitude * ys
+            self.plot_samples(xs, ys, canvas_height, center_y, instant, kind=kind, limits=limits)
+            return
 
-        def draw_step():
-            nonlocal x
-            if not self.is_auto_drawing or x > x_end:
-                self.is_auto_drawing = False
-                self.status_bar.config(text=f"自动绘画完成 | 滑动值: {self.slide_distance:.2f}")
+        # 以前算过的慢函数直接从磁盘映射读取（键不含路径，源码哈希相同即可命中）
+        if custom_func and preview is None and self.disk_cache_var.get():
+            stored = self.sample_cache.get(key[1:])
+            if stored is not None:
+                xs, ys = stored
+                self.curve_cache.put(key, xs, ys)
+                self.plot_samples(xs, ys, canvas_height, center_y, instant, kind=kind)
                 return
 
-            # 计算下一点
-            next_x = x + step
+        if custom_func:
+            # 自定义函数可能很慢，放到后台分块计算，避免界面卡死
+            self.eval_worker.set_mode(self.eval_mode.get())
+            if preview is not None:
+                # 进程模式要从文件重新加载函数，预览的代码只在线程中计算
+                file_path = None
+            self.eval_started = time.perf_counter()
+            if kind != "function":
+                self.eval_worker.submit(custom_func, sampler.curve_grid(turns), self.canvas_width,
+                                        center_y, amplitude, frequency, file_path=file_path,
+                                        func_name=func_name, kind=kind)
+            elif adaptive:
+                self.eval_worker.submit_adaptive(custom_func, x_end, self.canvas_width, center_y,
+                                                 amplitude, frequency, canvas_height, tolerance,
+                                                 file_path=file_path, func_name=func_name)
+            else:
+                xs = sampler.sample_grid(x_start, x_end, 2)
+                self.eval_worker.submit(custom_func, xs, self.canvas_width, center_y,
+                                        amplitude, frequency, file_path=file_path, func_name=func_name)
+                # 用区间算术估计Y范围，不必等全部计算完成就能确定缩放、开始绘制
+                with self.perf.timer("bounds"):
+                    bounds = interval.function_bounds(custom_func, x_start, x_end, self.canvas_width,
+                                                      center_y, amplitude, frequency)
+                self.stream_state = {"bounds": bounds, "limits": None, "drawn": 0, "rescales": 0}
+            self.poll_evaluation(canvas_height, center_y, key, instant, kind)
+            return
 
-            # 计算当前点和下一点的Y值
-            current_y = calculate_y_value(x)
-            next_y = calculate_y_value(next_x)
+        if adaptive:
+            # 按像素误差自适应采样
+            def evaluate(sample_xs):
+                return sampler.evaluate_builtin(func_type, sample_xs, self.canvas_width, center_y,
+                                                amplitude, frequency)
+            with self.perf.timer("eval"):
+                xs, ys = sampler.adaptive_sample(evaluate, x_start, x_end, canvas_height, center_y, tolerance)
+            self.curve_cache.put(key, xs, ys)
+        else:
+            # 在整个x网格上一次性计算振幅为1的基础曲线
+            step = 2
+            with self.perf.timer("eval"):
+                xs = sampler.sample_grid(x_start, x_end, step)
+                base = sampler.evaluate_builtin(func_type, xs, self.canvas_width, 0, 1, frequency)
+            self.curve_cache.put(key, xs, base)
+            ys = center_y + amplitude * base
+        self.plot_samples(xs, ys, canvas_height, center_y, instant, limits=limits)
+
+    def poll_evaluation(self, canvas_height, center_y, key, instant, kind="function"):
+        """定时取回后台计算结果，全部完成后开始绘制"""
+        self.eval_after_id = None
+        job = self.eval_worker.poll()
+        if job is None or not self.is_auto_drawing:
+            return
 
-            # 应用缩放
-            scaled_current_y = current_y * scale_factor + offset_y
-            scaled_next_y = next_y * scale_factor + offset_y
+        if not job.finished:
+            if self.stream_state is not None:
+                self.draw_stream(job, canvas_height, center_y)
+            self.status_bar.config(text=f"计算中... {job.done}/{job.total}")
+            self.eval_after_id = self.root.after(15, self.poll_evaluation, canvas_height,
+                                                 center_y, key, instant, kind)
+            return
 
-            # 绘制线条
-            self.canvas.create_line(x, scaled_current_y, next_x, scaled_next_y,
-                                    fill="green", width=2, tags="auto_draw")
-            
-            # 计算滑动值
-            distance = math.sqrt((next_x - x) ** 2 + (scaled_next_y - scaled_current_y) ** 2)
-            self.slide_distance += distance
+        self.eval_worker.job = None
+        elapsed = (time.perf_counter() - self.eval_started) * 1000
+        self.perf.record("eval", elapsed)
+        if job.xs is None:
+            self.status_bar.config(text=f"函数计算错误: {job.error}")
+            self.is_auto_drawing = False
+            return
+        xs, ys = (job.xs, job.ys) if kind == "function" else job.ys
+        self.curve_cache.put(key, xs, ys)
+        if (elapsed >= SAMPLE_CACHE_MIN_MS and key[0] != func_loader.EDITOR_NAME
+                and self.disk_cache_var.get()):
+            self.sample_cache.put(key[1:], xs, ys)
+        # 已经边算边画出的部分换成按完整数据缩放的曲线，不再重放动画
+        streamed = self.stream_state is not None and self.stream_state["drawn"] > 0
+        self.stream_state = None
+        self.canvas.delete("stream")
+        self.plot_samples(xs, ys, canvas_height, center_y, instant or streamed, job.error, kind)
+
+    def draw_stream(self, job, canvas_height, center_y):
+        """后台计算未完成时先画出已返回的连续部分
+
+        区间算术得到的Y范围足够紧时直接用它缩放；否则按已返回的数据缩放，
+        新数据超出当前范围时放宽范围并重画已画部分（渐进式重新缩放）。
+        """
+        stream = self.stream_state
+        count = job.ready
+        if count <= stream["drawn"]:
+            return
+        bounds = stream["bounds"]
+        if bounds is not None and bounds[2]:
+            limits = bounds[:2]
+        else:
+            limits = sampler.scale_limits(job.ys[:count])
+            if limits is None:
+                return
+        current = stream["limits"]
+        if current is None or limits[0] < current[0] or limits[1] > current[1]:
+            if current is not None or bounds is None or not bounds[2]:
+                margin = (limits[1] - limits[0]) * STREAM_MARGIN
+                limits = (limits[0] - margin, limits[1] + margin)
+            if current is not None:
+                self.canvas.delete("stream")
+                stream["drawn"] = 0
+                stream["rescales"] += 1
+            stream["limits"] = limits
+
+        scale_factor, offset_y = sampler.compute_scale(None, canvas_height, center_y, stream["limits"])
+        start = max(stream["drawn"] - 1, 0)
+        with self.perf.timer("canvas"):
+            xs, points_y, breaks = renderer.prepare_points(
+                job.xs[start:count], job.ys[start:count] * scale_factor + offset_y, canvas_height)
+            self.make_renderer(xs, points_y, ("auto_draw", "stream"), breaks,
+                               fill="green", width=2).draw_all()
+        if not stream["drawn"] and not stream["rescales"]:
+            self.perf.record("first_draw", (time.perf_counter() - self.eval_started) * 1000)
+        self.perf.count("points", count - start)
+        stream["drawn"] = count
+
+    def project_samples(self, xs, ys, canvas_height, center_y, kind="function", limits=None):
+        """把采样点投影到画布坐标并画出起始点
+
+        无定义的点被去掉，曲线在缺口和跨越整个画布的跳变处断开。
+        参数方程和极坐标曲线的两个方向按同一比例缩放到画布中央。
+        limits为已知的Y范围时函数曲线按它缩放，不再扫描ys。
+        返回 (x数组, 画布Y数组, 断点下标数组)。
+        """
+        # 计算缩放比例和偏移量，确保图像在画布内（忽略极点附近的离群值）
+        with self.perf.timer("scale"):
+            if kind == "function":
+                scale_factor, offset_y = sampler.compute_scale(ys, canvas_height, center_y, limits)
+                points_y = ys * scale_factor + offset_y
+                self.plot_transform = (scale_factor, offset_y)
+            else:
+                self.plot_transform = None
+                scale_factor, offset_x, offset_y = sampler.fit_curve(xs, ys, self.canvas_width, canvas_height)
+                xs = xs * scale_factor + offset_x
+                points_y = ys * scale_factor + offset_y
+            xs, points_y, breaks = renderer.prepare_points(xs, points_y, canvas_height)
+
+        # 绘制起始点
+        if len(xs):
+            x, scaled_start_y = float(xs[0]), float(points_y[0])
+            self.canvas.create_oval(x - 3, scaled_start_y - 3, x + 3, scaled_start_y + 3, fill="green", tags="auto_draw")
+        return xs, points_y, breaks
+
+    def make_renderer(self, xs, ys, tags, breaks, threshold=None, **options):
+        """按点数选择折线对象或栅格图层来绘制曲线"""
+        if threshold is None:
+            threshold = renderer.RASTER_THRESHOLD
+        return renderer.make_renderer(self.canvas, xs, ys, tags, (self.canvas_width, self.canvas_height),
+                                      self.raster_images, breaks=breaks, threshold=threshold, **options)
+
+    def plot_samples(self, xs, ys, canvas_height, center_y, instant=False, errors=None, kind="function",
+                     limits=None):
+        """缩放采样结果并绘制曲线，errors为本次计算的错误汇总
+
+        kind为参数方程或极坐标曲线时，xs、ys是曲线上各点的画布坐标。
+        limits为区间算术得到的Y范围，为None时按采样值计算。
+        """
+        if errors is None and np.isnan(ys).any():
+            # 来自缓存的结果没有错误信息，只报告无定义的点数
+            errors = sampler.EvalErrors()
+            errors.non_finite = int(np.isnan(ys).sum())
+        self.plot_state = {"xs": xs, "ys": ys, "width": self.canvas_width, "center_y": center_y,
+                           "errors": errors, "kind": kind, "limits": limits}
+        xs, points_y, breaks = self.project_samples(xs, ys, canvas_height, center_y, kind, limits)
+
+        # 整条曲线只用少量折线对象绘制，点数很多时画成一个栅格图层
+        polyline = self.make_renderer(xs, points_y, "auto_draw", breaks, fill="green", width=2)
+
+        # 分析曲线：每个点处的累计弧长用于更新滑动值，交点和极值立即标出
+        arc_length = self.analyze_curve(xs, points_y, breaks).cumulative
+        self.draw_analysis()
+
+        def advance(count, flush=False):
+            drawn, calls = polyline.drawn, polyline.calls
+            with self.perf.timer("canvas"):
+                polyline.extend_to(count)
+                if flush:
+                    polyline.flush()
+            self.perf.count("points", polyline.drawn - drawn)
+            self.perf.count("canvas_calls", polyline.calls - calls)
+
+        if instant or self.render_mode.get() == "instant":
+            advance(polyline.n_points, flush=True)
+            self.slide_distance += float(arc_length[-1])
+            self.slide_label.config(text=f"滑动距离: {self.slide_distance:.2f}")
+            self.is_auto_drawing = False
+            self.report_done()
+            return
+
+        base_distance = self.slide_distance
+
+        def update_slide():
+            # 栅格图层每帧只光栅化和更新一次图像，而不是每推进一批点更新一次
+            advance(self.scheduler.position, flush=True)
+            self.slide_distance = base_distance + float(arc_length[max(polyline.drawn - 1, 0)])
             self.slide_label.config(text=f"滑动距离: {self.slide_distance:.2f}")
+            self.perf.count("frame")
+            self.perf.count("label")
+
+        def finish():
+            self.scheduler = None
+            self.is_auto_drawing = False
+            self.report_done()
+
+        # 按每帧时间预算推进，而不是每10毫秒只画一段
+        self.scheduler = FrameScheduler(self.root, polyline.n_points, advance,
+                                        on_frame=update_slide, on_done=finish,
+                                        duration=ANIMATION_DURATIONS.get(self.duration_var.get()))
+        self.scheduler.start()
+
+    def analyze_curve(self, xs, points_y, breaks):
+        """分析已投影的曲线，函数曲线与Y上限的交点用真实函数值细化
+
+        细化要在GUI线程中多次调用函数，只对能批量求值的函数这样做；
+        其他自定义函数可能很慢，交点直接在采样点之间线性插值。
+        """
+        state = self.plot_state
+        evaluate = None
+        self.analysis_transform = None
+        if state["kind"] == "function" and self.plot_transform:
+            self.analysis_transform = (self.canvas_width / state["width"],) + tuple(self.plot_transform)
+        if (state["kind"] == "function" and self.plot_evaluate is not None and self.plot_transform
+                and self.plot_vectorized):
+            plot_evaluate = self.plot_evaluate
+            scale_factor, offset_y = self.plot_transform
+            ratio = state["width"] / self.canvas_width
+
+            def evaluate(canvas_xs):
+                return plot_evaluate(canvas_xs * ratio) * scale_factor + offset_y
+
+        with self.perf.timer("analysis"):
+            self.analysis = analysis.CurveAnalysis(xs, points_y, breaks, evaluate,
+                                                   monotonic=state["kind"] == "function",
+                                                   clip=(-self.canvas_height, 2 * self.canvas_height))
+        return self.analysis
+
+    def draw_analysis(self):
+        """标记曲线与Y上限的交点和局部极值，并显示分析摘要
+
+        缩放视图中分析结果仍是整条曲线的，标记位置按视图的平移和缩放换算，
+        Y上限先换算回分析时的投影再求交点。
+        """
+        self.canvas.delete("analysis")
+        result = self.analysis
+        if result is None:
+            return
+        level = self.y_limit
+        to_screen = None
+        if self.lod_view is not None and self.analysis_transform is not None:
+            x_scale, scale_factor, offset_y = self.analysis_transform
+            lod_scale, lod_offset = self.lod_transform
+            view = self.lod_view
+            # 数据空间中的Y值相同：(分析y - 偏移) / 比例 == (屏幕y - 偏移) / 比例
+            level = (level - lod_offset) / lod_scale * scale_factor + offset_y
+
+            def to_screen(xs, ys):
+                xs = (xs / x_scale - view.offset) * view.scale
+                ys = (ys - offset_y) / scale_factor * lod_scale + lod_offset
+                inside = (xs >= 0) & (xs <= self.canvas_width)
+                return xs[inside], ys[inside]
+        self.analysis_label.config(text=result.summary(level).replace(" | ", "\n"))
+        if not self.analysis_marks_var.get():
+            return
+        crossing_xs = result.crossings(level)
+        marks = [(crossing_xs, np.full(len(crossing_xs), float(level)), "red"),
+                 (*result.maxima, "orange"), (*result.minima, "purple")]
+        for mark_xs, mark_ys, color in marks:
+            if to_screen is not None:
+                mark_xs, mark_ys = to_screen(mark_xs, mark_ys)
+            for x, y in zip(mark_xs[:ANALYSIS_MARKERS].tolist(), mark_ys[:ANALYSIS_MARKERS].tolist()):
+                self.canvas.create_oval(x - 4, y - 4, x + 4, y + 4, outline=color, width=2,
+                                        tags=("auto_draw", "analysis"))
+
+    def report_done(self):
+        """状态栏显示绘制完成，附上本次绘图的错误汇总（每次绘图只报告一次）"""
+        text = f"自动绘画完成 | 滑动值: {self.slide_distance:.2f}"
+        errors = self.plot_state["errors"] if self.plot_state else None
+        if errors:
+            text += f" | 函数计算错误: {errors}"
+        self.status_bar.config(text=text)
+
+    def overlay_draw(self):
+        """叠加绘制：把下拉框中的所有函数画在同一张图上
+
+        所有函数在同一个x网格上求值，并对整个结果数组统一计算缩放；
+        每条曲线有自己的颜色和标签，取消勾选时只隐藏，不重新计算。
+        向量化的函数一次批量计算，其余函数逐个交给后台计算，算完一条画一条。
+        """
+        visible = {name: var.get() for name, var in self.overlay_vars.items()}
+        self.clear_canvas()
+        self.live_mode = "overlay"
 
-            x = next_x
-            self.root.after(10, draw_step)  # 动画效果
+        names, funcs, failed, curves = [], [], [], []
+        for name in self.function_index.names():
+            try:
+                with self.perf.timer("load"):
+                    func = self.function_cache.load(*split_name(name))
+            except Exception:
+                failed.append(name)
+                continue
+            if sampler.function_kind(func) != "function":
+                # 参数方程和极坐标曲线没有共同的x网格，不参与叠加
+                curves.append(name)
+                continue
+            funcs.append(func)
+            names.append(name)
+        if not funcs:
+            self.status_bar.config(text="错误: 没有可以叠加绘制的函数")
+            return
 
-        draw_step()
+        center_y = self.canvas_height / 2
+        amplitude = self.amplitude_var.get()
+        frequency = self.frequency_var.get()
+        xs = sampler.sample_grid(0, self.canvas_width, 2)
+        ys = np.full((len(funcs), len(xs)), np.nan)
+        errors = [None] * len(funcs)
+        fast = [row for row, func in enumerate(funcs) if sampler.is_vectorized(func)]
+        with self.perf.timer("eval"):
+            fast_ys, fast_errors = sampler.sample_many([funcs[row] for row in fast], xs, self.canvas_width,
+                                                       center_y, amplitude, frequency)
+        ys[fast] = fast_ys
+        for row, error in zip(fast, fast_errors):
+            errors[row] = error
+        self.overlay_state = {"names": names, "funcs": funcs, "xs": xs, "ys": ys, "errors": errors,
+                              "pending": [row for row in range(len(funcs)) if row not in fast],
+                              "failed": failed, "curves": curves, "width": self.canvas_width,
+                              "center_y": center_y, "amp": amplitude, "freq": frequency}
+        self.build_overlay_legend(names, visible)
+        self.draw_overlay_curves()
+        if self.overlay_state["pending"]:
+            self.is_auto_drawing = True
+            self.eval_worker.set_mode(self.eval_mode.get())
+            self.eval_started = time.perf_counter()
+            self.submit_overlay()
+        else:
+            self.report_overlay()
+
+    def submit_overlay(self):
+        """把下一条等待计算的叠加曲线交给后台"""
+        state = self.overlay_state
+        row = state["pending"][0]
+        file_path, func_name = split_name(state["names"][row])
+        self.eval_worker.submit(state["funcs"][row], state["xs"], state["width"], state["center_y"],
+                                state["amp"], state["freq"], file_path=file_path, func_name=func_name)
+        self.eval_after_id = self.root.after(15, self.poll_overlay)
+
+    def poll_overlay(self):
+        """取回后台计算的叠加曲线，每算完一条按新的统一缩放重绘"""
+        self.eval_after_id = None
+        job = self.eval_worker.poll()
+        state = self.overlay_state
+        if job is None or state is None or not self.is_auto_drawing:
+            return
+        if not job.finished:
+            name = state["names"][state["pending"][0]]
+            self.status_bar.config(text=f"叠加绘制计算中... {name} {job.done}/{job.total} | "
+                                        f"剩余 {len(state['pending'])} 个函数")
+            self.eval_after_id = self.root.after(15, self.poll_overlay)
+            return
+
+        self.eval_worker.job = None
+        row = state["pending"].pop(0)
+        state["ys"][row] = job.ys
+        state["errors"][row] = job.error
+        self.draw_overlay_curves()
+        if state["pending"]:
+            self.submit_overlay()
+            return
+        self.perf.record("eval", (time.perf_counter() - self.eval_started) * 1000)
+        self.is_auto_drawing = False
+        self.report_overlay()
+
+    def report_overlay(self):
+        """叠加绘制完成后在状态栏汇报加载失败、跳过的曲线和计算错误"""
+        state = self.overlay_state
+        status = f"叠加绘制完成: {len(state['names'])} 个函数"
+        errors = [f"{name}: {error}" for name, error in zip(state["names"], state["errors"]) if error]
+        if state["failed"]:
+            status += f" | 加载失败: {', '.join(state['failed'])}"
+        if state["curves"]:
+            status += f" | 跳过曲线: {', '.join(state['curves'])}"
+        if errors:
+            status += f" | 计算错误: {errors[0]}"
+        self.status_bar.config(text=status)
+
+    def draw_overlay_curves(self):
+        """按当前画布尺寸投影叠加曲线，所有曲线共用同一个缩放"""
+        state = self.overlay_state
+        self.canvas.delete("overlay")
+        xs = state["xs"] * (self.canvas_width / state["width"])
+        scale_factor, offset_y = sampler.compute_scale(state["ys"], self.canvas_height, state["center_y"])
+        points_y = state["ys"] * scale_factor + offset_y
+        # 按所有曲线的总点数选择绘制方式
+        threshold = renderer.RASTER_THRESHOLD // max(len(state["names"]), 1)
+        for i, name in enumerate(state["names"]):
+            tag = f"curve_{name}"
+            curve_xs, curve_ys, breaks = renderer.prepare_points(xs, points_y[i], self.canvas_height)
+            self.make_renderer(curve_xs, curve_ys, ("auto_draw", "overlay", tag), breaks, threshold,
+                               fill=OVERLAY_COLORS[i % len(OVERLAY_COLORS)], width=2).draw_all()
+            if not self.overlay_vars[name].get():
+                self.canvas.itemconfigure(tag, state="hidden")
+
+    def build_overlay_legend(self, names, visible=None):
+        """重建叠加曲线的开关列表，保留同名曲线之前的勾选状态"""
+        if self.overlay_frame is None:
+            if not names:
+                return
+            self.overlay_frame = ttk.LabelFrame(self.control_frame, text="叠加曲线")
+            self.overlay_frame.pack(fill=tk.X, padx=5, pady=5)
+        for check in self.overlay_checks:
+            check.destroy()
+        self.overlay_checks = []
+        self.overlay_vars = {}
+        visible = visible or {}
+        for i, name in enumerate(names):
+            var = tk.BooleanVar(value=visible.get(name, True))
+            check = tk.Checkbutton(self.overlay_frame, text=name, variable=var, anchor=tk.W,
+                                   fg=OVERLAY_COLORS[i % len(OVERLAY_COLORS)],
+                                   command=lambda n=name: self.toggle_overlay_curve(n))
+            check.pack(fill=tk.X, padx=5)
+            self.overlay_vars[name] = var
+            self.overlay_checks.append(check)
+
+    def toggle_overlay_curve(self, name):
+        """显示或隐藏一条叠加曲线"""
+        state = "normal" if self.overlay_vars[name].get() else "hidden"
+        self.canvas.itemconfigure(f"curve_{name}", state=state)
+
+    def toggle_perf_overlay(self):
+        """显示或隐藏画布右上角的性能信息"""
+        if self.perf_after_id is not None:
+            self.root.after_cancel(self.perf_after_id)
+            self.perf_after_id = None
+        self.canvas.delete("perf_overlay")
+        if self.perf_overlay_var.get():
+            self.update_perf_overlay()
+
+    def update_perf_overlay(self):
+        """刷新性能信息：帧率、每秒绘制点数、画布对象数和最近一次各阶段耗时"""
+        perf = self.perf
+
+        def ms(name):
+            value = perf.last(name)
+            return "-" if value is None else f"{value:.1f}ms"
+
+        lines = [
+            f"FPS {perf.rate('frame'):.0f} | 点/秒 {perf.rate('points'):,.0f}",
+            f"画布调用/秒 {perf.rate('canvas_calls'):.0f} | 标签更新/秒 {perf.rate('label'):.0f}",
+            f"画布对象 {len(self.canvas.find_all())}",
+            f"加载 {ms('load')} | 计算 {ms('eval')} | 缩放 {ms('scale')} | 绘制 {ms('canvas')}",
+        ]
+        self.canvas.delete("perf_overlay")
+        self.canvas.create_text(self.canvas_width - 8, 8, text="\n".join(lines), anchor=tk.NE,
+                                justify=tk.RIGHT, fill="gray30", tags="perf_overlay")
+        self.perf_after_id = self.root.after(PERF_OVERLAY_MS, self.update_perf_overlay)
+
+    def export_perf(self):
+        """把性能数据导出为JSON或CSV文件"""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+        if not path:
+            return
+        try:
+            self.perf.dump(path)
+            self.status_bar.config(text=f"性能数据已导出到 {path}")
+        except OSError as e:
+            self.status_bar.config(text=f"导出失败: {e}")
+
+    def clear_sample_cache(self):
+        """删除磁盘上缓存的全部曲线"""
+        removed = self.sample_cache.clear()
+        self.status_bar.config(text=f"已清除磁盘缓存: {removed} 条曲线")
+
+    def cancel_animation(self):
+        """取消正在进行的自动绘画动画和后台计算"""
+        if self.scheduler:
+            self.scheduler.cancel()
+            self.scheduler = None
+        if self._eval_worker is not None:
+            self._eval_worker.cancel()
+        if self.eval_after_id is not None:
+            self.root.after_cancel(self.eval_after_id)
+            self.eval_after_id = None
+        self.stream_state = None
+
+    def on_close(self):
+        """关闭窗口时停止后台计算"""
+        self.cancel_animation()
+        if self.index_after_id is not None:
+            self.root.after_cancel(self.index_after_id)
+        if self.perf_after_id is not None:
+            self.root.after_cancel(self.perf_after_id)
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+        if self._eval_worker is not None:
+            self._eval_worker.shutdown()
+        self.root.destroy()
 
     def stop_drawing(self):
         """停止所有绘画"""
         self.is_drawing = False
         self.is_auto_drawing = False
+        self.cancel_animation()
         self.status_bar.config(text=f"绘画已停止 | 滑动值: {self.slide_distance:.2f}")
 
     def save_custom_function(self):
         """保存自定义函数到文件"""
-        func_name = self.custom_func_name_var.get().strip()
-        if not func_name:
+        name = self.custom_func_name_var.get().strip()
+        if not name:
             self.status_bar.config(text="错误: 函数名称不能为空")
             return
+        file_path, func_name = split_name(name)
+        if is_engine_module(name):
+            self.status_bar.config(text=f"错误: {file_path} 是程序自身的模块，请换一个函数名称")
+            return
 
         code = self.custom_code_text.get("1.0", tk.END).strip()
         if not code:
@@ -424,17 +1417,101 @@ class DrawingApp:
             return
 
         try:
-            with open(f"{func_name}.py", "w", encoding="utf-8") as f:
+            with open(file_path, "w", encoding="utf-8") as f:
                 f.write(code)
-            self.status_bar.config(text=f"自定义函数 '{func_name}' 已保存到 {func_name}.py")
+            # 用新内容更新函数缓存，新文件立即出现在下拉框中
+            self.function_cache.store(file_path, func_name, code)
+            self.refresh_function_index()
+            self.status_bar.config(text=f"自定义函数 '{func_name}' 已保存到 {file_path}")
         except Exception as e:
             self.status_bar.config(text=f"保存失败: {str(e)}")
 
+    def on_code_modified(self, event=None):
+        """编辑器内容改变：实时预览打开时，停止输入一段时间后再编译"""
+        if not self.custom_code_text.edit_modified():
+            return
+        self.custom_code_text.edit_modified(False)
+        if not self.live_preview_var.get():
+            return
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+        self.preview_after_id = self.root.after(PREVIEW_DELAY_MS, self.preview_code)
+
+    def toggle_live_preview(self):
+        """打开实时预览时立即预览一次，关闭时恢复使用文件中的函数"""
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+            self.preview_after_id = None
+        self.preview_func = None
+        if self.live_preview_var.get():
+            self.preview_code()
+        else:
+            self.show_code_error("")
+
+    def preview_code(self):
+        """在内存中编译编辑器中的代码并重绘；语法树没有变化（只改了注释、空白）时不重新采样"""
+        self.preview_after_id = None
+        if not self.live_preview_var.get():
+            return
+        name = self.custom_func_name_var.get().strip()
+        if not name:
+            self.show_code_error("请先设置自定义函数名称")
+            return
+        file_path, func_name = split_name(name)
+        if is_engine_module(name):
+            self.show_code_error(f"{file_path} 是程序自身的模块，请换一个函数名称")
+            return
+        code = self.custom_code_text.get("1.0", tk.END)
+        try:
+            with self.perf.timer("compile"):
+                func, version = self.function_cache.compile_source(code, func_name)
+            # 试算一个点，找出拼写错误、参数错误等只有执行时才发现的问题
+            func(self.canvas_width / 2, self.canvas_width, self.canvas_height / 2,
+                 self.amplitude_var.get(), self.frequency_var.get())
+        except SyntaxError as e:
+            self.show_code_error(f"第 {e.lineno} 行语法错误: {e.msg}", e.lineno)
+            return
+        except func_loader.LoadError as e:
+            self.show_code_error(str(e))
+            return
+        except CODE_ERRORS as e:
+            line = self.editor_line(e, func_name)
+            where = f"第 {line} 行" if line else "代码"
+            self.show_code_error(f"{where}错误: {type(e).__name__}: {e}", line)
+            return
+        except Exception:
+            # 试算点不在定义域内等情况照常绘制，由绘图结果报告无定义的点
+            pass
+        self.show_code_error("")
+
+        if self.preview_func is not None and self.preview_func[0] == name and self.preview_func[2] == version:
+            return
+        self.preview_func = (name, func, version)
+        self.func_type.set("custom")
+        self.auto_draw(instant=True)
+
+    def editor_line(self, error, func_name):
+        """异常在编辑器代码中的行号，找不到时返回None"""
+        names = {func_loader.EDITOR_NAME, f"<{func_name}>"}
+        for frame in reversed(traceback.extract_tb(error.__traceback__)):
+            if frame.filename in names:
+                return frame.lineno
+        return None
+
+    def show_code_error(self, message, line=None):
+        """在编辑器下方显示错误并标出所在行，message为空时清除"""
+        self.custom_code_text.tag_remove("code_error", "1.0", tk.END)
+        if line:
+            self.custom_code_text.tag_add("code_error", f"{line}.0", f"{line}.end")
+        self.code_error_label.config(text=message)
+        if message:
+            self.status_bar.config(text=f"预览: {message}")
+
     def clear_custom_function(self):
         """清除自定义函数内容，替换为x*math.pi函数"""
         self.custom_code_text.delete("1.0", tk.END)
         # 使用函数名称框中的内容作为函数名
-        func_name = self.custom_func_name_var.get()
+        _, func_name = split_name(self.custom_func_name_var.get())
         self.custom_code_text.insert("1.0", 
             f"def {func_name}(x, width, center_y, amp, freq):\n"
             "    # x: 当前x坐标\n"
@@ -448,22 +1525,25 @@ class DrawingApp:
         self.status_bar.config(text="自定义函数内容已重置为x*math.pi函数")
 
     def populate_file_combobox(self):
-        """填充文件下拉框，列出所有.py文件（除了main.py）"""
-        import os
-        
-        # 获取当前目录下的所有.py文件
-        py_files = []
-        for file in os.listdir('.'):
-            if file.endswith('.py') and file != 'main.py':
-                # 去掉.py后缀
-                py_files.append(file[:-3])
-        
-        # 填充下拉框
-        self.file_combobox['values'] = py_files
-        
-        # 如果有文件，默认选择第一个
-        if py_files:
+        """填充文件下拉框，列出函数文件中所有可绘制的函数，并开始监视目录"""
+        self.refresh_function_index()
+
+        # 如果有函数，默认选择第一个
+        if self.function_index.names():
             self.file_combobox.current(0)
+        self.index_after_id = self.root.after(FUNCTION_WATCH_MS, self.watch_function_files)
+
+    def refresh_function_index(self):
+        """重新扫描函数文件，只有索引变化时才更新下拉框"""
+        if self.function_index.scan():
+            self.file_combobox['values'] = self.function_index.names()
+            if self._function_cache is not None:
+                self._function_cache.max_entries = self.function_cache_size()
+
+    def watch_function_files(self):
+        """定时检查函数文件的新增、修改和删除"""
+        self.refresh_function_index()
+        self.index_after_id = self.root.after(FUNCTION_WATCH_MS, self.watch_function_files)
 
     def on_file_select(self, event):
         """处理文件选择事件，读取文件内容并显示在代码框中"""
@@ -473,7 +1553,7 @@ class DrawingApp:
         
         try:
             # 构建文件路径
-            file_path = f"{selected_file}.py"
+            file_path, _ = split_name(selected_file)
             
             # 读取文件内容
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -493,9 +1573,14 @@ class DrawingApp:
             self.status_bar.config(text=f"读取文件失败: {str(e)}")
 
     def show_help(self):
-        """显示math库帮助窗口"""
+        """显示math库帮助窗口（只创建一次，之后再打开时直接显示）"""
+        if self.help_window is not None and self.help_window.winfo_exists():
+            self.help_window.deiconify()
+            self.help_window.lift()
+            return
+
         # 创建帮助窗口
-        help_window = tk.Toplevel(self.root)
+        help_window = self.help_window = tk.Toplevel(self.root)
         help_window.title("Math库帮助")
         help_window.geometry("500x400")
         help_window.resizable(True, True)
@@ -563,11 +1648,16 @@ distance = math.sqrt(math.pow(x2-x1, 2) + math.pow(y2-y1, 2))
 
 6. 在自定义函数中使用
 -------------------
-# 示例：创建一个螺旋函数
-def spiral(x, width, center_y, amp, freq):
-    angle = freq * 2 * math.pi * x / width
-    radius = amp * x / width
-    return center_y + radius * math.sin(angle)
+# 第一个参数名为 theta 时是极坐标方程，返回半径r
+# 示例：阿基米德螺线，θ的范围由高级选项中的"曲线圈数"决定
+def spiral(theta, width, center_y, amp, freq):
+    return amp * theta / (2 * math.pi)
+
+# 第一个参数名为 t 时是参数方程，返回画布坐标 (x, y)
+# 示例：李萨如图形
+def lissajous(t, width, center_y, amp, freq):
+    return (width / 2 + amp * math.sin(freq * t),
+            center_y + amp * math.sin((freq + 1) * t))
 
 # 示例：创建一个复合波形
 def complex_wave(x, width, center_y, amp, freq):
@@ -582,7 +1672,53 @@ def complex_wave(x, width, center_y, amp, freq):
         help_text.config(state=tk.DISABLED)
 
 
+def report_startup(marks):
+    """打印启动各阶段耗时和延迟导入的后端耗时，返回是否在启动时间预算内"""
+    print("启动耗时（从main.py开始执行计时）:")
+    previous = _START_TIME
+    for name, moment in marks:
+        print(f"  {name:<8} {(moment - previous) * 1000:8.1f} ms")
+        previous = moment
+    total = (marks[-1][1] - _START_TIME) * 1000
+    within = total <= STARTUP_BUDGET_MS
+    print(f"  首帧总耗时 {total:.1f} ms（预算 {STARTUP_BUDGET_MS} ms，{'未超出' if within else '超出预算'}）")
+    print(f"  启动时已加载 {len(sys.modules)} 个模块，numpy{'已' if 'numpy' in sys.modules else '未'}加载")
+
+    # 第一次绘图时才会发生的导入，包括所有声明为LazyModule的模块
+    print("延迟导入（第一次绘图时加载）:")
+    for module in list(LAZY_MODULES.values()):
+        module.load()
+    for name, seconds in IMPORT_TIMES.items():
+        print(f"  {name:<12} {seconds * 1000:8.1f} ms")
+    print("逐模块的导入耗时可以用 python -X importtime main.py --profile-startup 查看")
+    return within
+
+
+def profile_startup(root, app, marks):
+    """画布第一次绘制完成后打印启动报告并退出"""
+    result = []
+
+    def first_frame(event):
+        app.canvas.unbind("<Expose>")
+        root.after_idle(finish)
+
+    def finish():
+        marks.append(("首帧", time.perf_counter()))
+        result.append(report_startup(marks))
+        app.on_close()
+
+    app.canvas.bind("<Expose>", first_frame)
+    return result
+
+
 if __name__ == "__main__":
+    marks = [("导入模块", time.perf_counter())]
     root = tk.Tk()
+    marks.append(("创建窗口", time.perf_counter()))
     app = DrawingApp(root)
+    marks.append(("构建界面", time.perf_counter()))
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
+    profile = profile_startup(root, app, marks) if "--profile-startup" in sys.argv[1:] else None
     root.mainloop()
+    if profile is not None:
+        sys.exit(0 if profile and profile[0] else 1)
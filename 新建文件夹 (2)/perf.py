@@ -0,0 +1,139 @@
+import csv
+import json
+import time
+from array import array
+
+
+# 每个指标保留的最近样本数
+RING_SIZE = 2048
+
+
+class Metric:
+    """一个指标最近的样本（时间戳, 数值），保存在定长的环形缓冲区中"""
+
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.times = array("d", bytes(8 * size))
+        self.values = array("d", bytes(8 * size))
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value, now):
+        i = self.count % self.size
+        self.times[i] = now
+        self.values[i] = value
+        self.count += 1
+        self.total += value
+
+    @property
+    def last(self):
+        return self.values[(self.count - 1) % self.size] if self.count else None
+
+    def samples(self):
+        """按时间顺序返回缓冲区中的 (时间戳, 数值) 列表"""
+        start = max(0, self.count - self.size)
+        return [(self.times[i % self.size], self.values[i % self.size])
+                for i in range(start, self.count)]
+
+    def since(self, moment):
+        """moment之后的样本数值"""
+        values = []
+        for k in range(min(self.count, self.size)):
+            i = (self.count - 1 - k) % self.size
+            if self.times[i] < moment:
+                break
+            values.append(self.values[i])
+        return values
+
+
+class _Timer:
+    __slots__ = ("metric", "start")
+
+    def __init__(self, metric):
+        self.metric = metric
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        now = time.perf_counter()
+        self.metric.add((now - self.start) * 1000, now)
+
+
+class PerfMonitor:
+    """热点路径的计时器和计数器
+
+    timer(name) 记录一段代码的耗时（毫秒），count(name, n) 记录事件数量。
+    每次记录只有一次 perf_counter 和两次数组写入，可以一直开着；
+    需要时再汇总最近一段时间的数据或导出为JSON/CSV。
+    """
+
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.metrics = {}
+        self.start = time.perf_counter()
+
+    def metric(self, name):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = Metric(self.size)
+        return metric
+
+    def record(self, name, value):
+        self.metric(name).add(value, time.perf_counter())
+
+    def count(self, name, n=1):
+        self.record(name, n)
+
+    def timer(self, name):
+        return _Timer(self.metric(name))
+
+    def last(self, name):
+        metric = self.metrics.get(name)
+        return metric.last if metric else None
+
+    def rate(self, name, window=1.0):
+        """最近window秒内的数值总和除以window（计数器即每秒次数）"""
+        metric = self.metrics.get(name)
+        if metric is None:
+            return 0.0
+        return sum(metric.since(time.perf_counter() - window)) / window
+
+    def summary(self, window=1.0):
+        """每个指标的累计次数和最近window秒内的次数、平均值、最大值、速率"""
+        since = time.perf_counter() - window
+        result = {}
+        for name, metric in self.metrics.items():
+            recent = metric.since(since)
+            result[name] = {
+                "count": metric.count,
+                "total": metric.total,
+                "recent": len(recent),
+                "mean": sum(recent) / len(recent) if recent else None,
+                "max": max(recent) if recent else None,
+                "rate": sum(recent) / window,
+            }
+        return result
+
+    def dump(self, path):
+        """导出缓冲区中的全部样本，扩展名为.csv时导出CSV，否则导出JSON
+
+        时间戳为相对监视器创建时刻的秒数。
+        """
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["metric", "time_s", "value"])
+                for name, metric in self.metrics.items():
+                    for moment, value in metric.samples():
+                        writer.writerow([name, f"{moment - self.start:.6f}", value])
+        else:
+            trace = {
+                "summary": self.summary(),
+                "samples": {name: [[round(moment - self.start, 6), value]
+                                   for moment, value in metric.samples()]
+                            for name, metric in self.metrics.items()},
+            }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace, f, ensure_ascii=False, indent=1)
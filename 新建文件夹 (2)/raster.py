@@ -0,0 +1,165 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+# 一次画折线时取点总数的上限，折线极长时按比例降低取点密度
+MAX_SAMPLES = 8_000_000
+
+
+class Raster:
+    """内存中的RGB或RGBA像素缓冲区，不依赖Tk，可直接保存为BMP/PNG
+
+    background有4个分量时为RGBA缓冲区（例如全透明背景的曲线图层）。
+    """
+
+    def __init__(self, width, height, background=(255, 255, 255)):
+        self.width = width
+        self.height = height
+        self.channels = len(background)
+        self.pixels = np.empty((height, width, self.channels), dtype=np.uint8)
+        self.pixels[:] = background
+
+    def _stamp(self, px, py, color, line_width):
+        """在一组点上按线宽盖章"""
+        radius = max(0, int(round(line_width / 2)))
+        ix = np.rint(px).astype(np.int64)
+        iy = np.rint(py).astype(np.int64)
+        for ox in range(-radius, radius + 1):
+            for oy in range(-radius, radius + 1):
+                if ox * ox + oy * oy > radius * radius:
+                    continue
+                x = ix + ox
+                y = iy + oy
+                inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+                self.pixels[y[inside], x[inside]] = color
+
+    def _coverage(self, px, py, line_width):
+        """抗锯齿：每个像素的覆盖率由像素中心到最近采样点的距离决定，线条边缘在一个像素内过渡
+
+        只在这些点的外接矩形（与画布的交集）内计算，返回 (覆盖率数组, 左上角x, 左上角y)，
+        外接矩形在画布外时覆盖率数组为None。
+        """
+        half = line_width / 2
+        radius = int(np.ceil(half + 0.5))
+        ix = np.floor(px).astype(np.int64)
+        iy = np.floor(py).astype(np.int64)
+        x_lo, x_hi = max(int(ix.min()) - radius, 0), min(int(ix.max()) + radius + 1, self.width)
+        y_lo, y_hi = max(int(iy.min()) - radius, 0), min(int(iy.max()) + radius + 1, self.height)
+        if x_lo >= x_hi or y_lo >= y_hi:
+            return None, 0, 0
+        box_width = x_hi - x_lo
+        coverage = np.zeros((y_hi - y_lo) * box_width, dtype=np.float32)
+        for ox in range(-radius, radius + 1):
+            for oy in range(-radius, radius + 1):
+                x = ix + ox
+                y = iy + oy
+                value = np.clip(half + 0.5 - np.hypot(x + 0.5 - px, y + 0.5 - py), 0, 1)
+                keep = (value > 0) & (x >= x_lo) & (x < x_hi) & (y >= y_lo) & (y < y_hi)
+                np.maximum.at(coverage, (y[keep] - y_lo) * box_width + x[keep] - x_lo,
+                              value[keep].astype(np.float32))
+        return coverage.reshape(y_hi - y_lo, box_width), x_lo, y_lo
+
+    def _blend(self, coverage, color, x_lo=0, y_lo=0):
+        """按覆盖率把颜色叠加到缓冲区上（RGBA缓冲区按透明度合成），coverage左上角位于 (x_lo, y_lo)"""
+        if coverage is None:
+            return
+        rows, cols = np.nonzero(coverage)
+        if not len(rows):
+            return
+        alpha = coverage[rows, cols][:, None]
+        rows, cols = rows + y_lo, cols + x_lo
+        rgb = np.asarray(color[:3], dtype=np.float32)
+        dst = self.pixels[rows, cols].astype(np.float32)
+        if self.channels == 4:
+            dst_alpha = dst[:, 3:] / 255
+            out_alpha = alpha + dst_alpha * (1 - alpha)
+            dst[:, :3] = (rgb * alpha + dst[:, :3] * dst_alpha * (1 - alpha)) / out_alpha
+            dst[:, 3:] = out_alpha * 255
+        else:
+            dst = rgb * alpha + dst * (1 - alpha)
+        self.pixels[rows, cols] = np.rint(dst).astype(np.uint8)
+
+    def draw_polyline(self, xs, ys, color=(0, 128, 0), line_width=2, breaks=(), antialias=False):
+        """画折线：沿折线每隔半个像素取点，breaks中的点下标处断开
+
+        取点数只与画出的长度有关，与顶点数无关，几百万个点的密集曲线也很快。
+        antialias为True时按覆盖率混合颜色（抗锯齿），否则直接盖章。
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if len(xs) < 2:
+            return
+        x0, y0 = xs[:-1], ys[:-1]
+        dx, dy = np.diff(xs), np.diff(ys)
+        valid = np.isfinite(x0) & np.isfinite(y0) & np.isfinite(dx) & np.isfinite(dy)
+        valid[np.asarray(breaks, dtype=np.int64) - 1] = False
+        index = np.flatnonzero(valid)
+        x0, y0, dx, dy = x0[index], y0[index], dx[index], dy[index]
+        if not len(x0):
+            return
+
+        # 按弧长（切比雪夫距离）均匀取点；画到画布外很远的线段限制长度，避免占用过多内存
+        limit = 2 * (self.width + self.height)
+        lengths = np.maximum(np.abs(dx), np.abs(dy)).clip(0, limit)
+        ends = np.cumsum(lengths)
+        spacing = max(0.5, float(ends[-1]) / MAX_SAMPLES)
+        s = np.arange(0, float(ends[-1]), spacing)
+        segment = np.searchsorted(ends, s, side="right").clip(0, len(lengths) - 1)
+        with np.errstate(all="ignore"):
+            t = np.clip((s - ends[segment] + lengths[segment]) / lengths[segment], 0, 1)
+        t = np.nan_to_num(t)
+        # 每条连续折线的起点和终点总是保留
+        first = np.flatnonzero(np.diff(index, prepend=-2) != 1)
+        last = np.flatnonzero(np.diff(index, append=index[-1] + 2) != 1)
+        px = np.concatenate((x0[segment] + t * dx[segment], x0[first], x0[last] + dx[last]))
+        py = np.concatenate((y0[segment] + t * dy[segment], y0[first], y0[last] + dy[last]))
+        if antialias:
+            coverage, x_lo, y_lo = self._coverage(px, py, line_width)
+            self._blend(coverage, color, x_lo, y_lo)
+        else:
+            self._stamp(px, py, color, line_width)
+
+    def fill_circle(self, cx, cy, radius, color):
+        """画实心圆（用于起始点）"""
+        if not (np.isfinite(cx) and np.isfinite(cy)):
+            return
+        x_lo, x_hi = max(0, int(cx - radius)), min(self.width, int(cx + radius) + 1)
+        y_lo, y_hi = max(0, int(cy - radius)), min(self.height, int(cy + radius) + 1)
+        if x_lo >= x_hi or y_lo >= y_hi:
+            return
+        yy, xx = np.mgrid[y_lo:y_hi, x_lo:x_hi]
+        mask = (xx - cx) ** 2 + (yy - cy) ** 2 <= radius * radius
+        self.pixels[y_lo:y_hi, x_lo:x_hi][mask] = color
+
+    def to_bmp(self):
+        """编码为24位BMP（RGBA缓冲区忽略透明度）"""
+        row_size = (self.width * 3 + 3) & ~3
+        data = np.zeros((self.height, row_size), dtype=np.uint8)
+        # BMP按BGR顺序、自下而上存储
+        data[:, :self.width * 3] = self.pixels[::-1, :, 2::-1].reshape(self.height, -1)
+        image = data.tobytes()
+        header = struct.pack("<2sIHHI", b"BM", 54 + len(image), 0, 0, 54)
+        info = struct.pack("<IiiHHIIiiII", 40, self.width, self.height, 1, 24, 0,
+                           len(image), 2835, 2835, 0, 0)
+        return header + info + image
+
+    def to_png(self, level=6):
+        """编码为PNG（RGB或RGBA，无滤波），level为zlib压缩级别"""
+        def chunk(kind, body):
+            return (struct.pack(">I", len(body)) + kind + body
+                    + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+        rows = np.zeros((self.height, self.width * self.channels + 1), dtype=np.uint8)
+        rows[:, 1:] = self.pixels.reshape(self.height, -1)
+        color_type = 6 if self.channels == 4 else 2
+        ihdr = struct.pack(">IIBBBBB", self.width, self.height, 8, color_type, 0, 0, 0)
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr)
+                + chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + chunk(b"IEND", b""))
+
+    def save(self, path):
+        """按扩展名保存为BMP或PNG"""
+        data = self.to_png() if path.lower().endswith(".png") else self.to_bmp()
+        with open(path, "wb") as f:
+            f.write(data)
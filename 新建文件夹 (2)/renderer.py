@@ -0,0 +1,170 @@
+import base64
+
+import numpy as np
+
+from raster import Raster
+
+
+# 每个折线对象最多包含的点数，超过后分块，避免单次coords()调用过大
+CHUNK_POINTS = 512
+# 点数超过此值时改用栅格图层（一个PhotoImage图像对象）绘制
+RASTER_THRESHOLD = 20000
+# 栅格图层更新到PhotoImage时的PNG压缩级别（越低越快）
+RASTER_PNG_LEVEL = 1
+
+
+def flatten_points(xs, ys):
+    """把x、y数组交错成 create_line/coords 需要的坐标列表"""
+    coords = np.empty(len(xs) * 2, dtype=float)
+    coords[0::2] = xs
+    coords[1::2] = ys
+    return coords.tolist()
+
+
+def prepare_points(xs, ys, canvas_height):
+    """整理投影后的画布坐标，返回 (x数组, y数组, 断点下标数组)
+
+    远离画布的点截断到画布上下各一个画布高度处；去掉NaN点。
+    断点下标i表示第i-1点与第i点之间不连线：两点之间有被去掉的点，
+    或者跳变超过画布高度（例如tan的极点两侧）。
+    """
+    ys = np.clip(ys, -canvas_height, 2 * canvas_height)
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    index = np.flatnonzero(finite)
+    xs, ys = xs[finite], ys[finite]
+    split = (np.diff(index) > 1) | (np.abs(np.diff(ys)) > canvas_height)
+    return xs, ys, np.flatnonzero(split) + 1
+
+
+class PolylineRenderer:
+    """用少量多点折线对象绘制整条曲线
+
+    立即模式一次画完所有分块；逐步模式通过coords()延长同一个对象，
+    无论画布多宽，画布对象数量都保持不变。breaks中的点下标处曲线断开，
+    从该点开始新的折线对象。
+    """
+
+    def __init__(self, canvas, coords, tags, chunk=CHUNK_POINTS, breaks=(), **options):
+        self.canvas = canvas
+        self.coords = coords
+        self.n_points = len(coords) // 2
+        self.tags = tags
+        self.chunk = max(2, chunk)
+        self.options = options
+        self.drawn = 0
+        self.chunk_start = 0
+        self.item = None
+        self.breaks = [int(b) for b in breaks] + [self.n_points]
+        self.next_break = 0
+        self.calls = 0  # create_line/coords 调用次数
+
+    def draw_all(self):
+        """立即模式：一次画完整条曲线"""
+        self.extend_to(self.n_points)
+
+    def extend_to(self, count):
+        """逐步模式：把曲线延长到前count个点"""
+        count = min(count, self.n_points)
+        while self.drawn < count:
+            boundary = self.breaks[self.next_break]
+            end = min(count, self.chunk_start + self.chunk, boundary)
+            if end - self.chunk_start >= 2:
+                points = self.coords[2 * self.chunk_start:2 * end]
+                if self.item is None:
+                    self.item = self.canvas.create_line(points, tags=self.tags, **self.options)
+                else:
+                    self.canvas.coords(self.item, points)
+                self.calls += 1
+            self.drawn = end
+            if end == boundary:
+                # 断点：下一段不与当前段相连
+                self.chunk_start = end
+                self.item = None
+                self.next_break += 1
+            elif end < count:
+                # 当前分块已满，下一块与它共享端点以保持曲线连续
+                self.chunk_start = end - 1
+                self.item = None
+
+    def flush(self):
+        """折线在extend_to中已经画出，每帧不需要再更新"""
+
+    @property
+    def finished(self):
+        return self.drawn >= self.n_points
+
+
+class RasterRenderer:
+    """把曲线抗锯齿地光栅化到RGBA缓冲区，整个图层作为一个PhotoImage图像对象显示
+
+    接口与PolylineRenderer相同。点数很多时，画布重绘和命中检测只需处理一个
+    图像对象。逐步模式下extend_to只记下目标位置，flush()（每帧调用一次）才把
+    新增的线段一次光栅化，并把缓冲区更新到同一个PhotoImage。
+    images是调用方保存的 {标签: PhotoImage} 字典，同一标签的图层复用同一个图像，
+    同时保持引用，避免图像被回收后从画布上消失。
+    """
+
+    def __init__(self, canvas, xs, ys, tags, size, images, breaks=(), fill="black", width=1, **options):
+        self.canvas = canvas
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.n_points = len(self.xs)
+        self.tags = tags
+        self.key = tags if isinstance(tags, str) else tuple(tags)
+        self.images = images
+        self.breaks = np.asarray(breaks, dtype=int)
+        self.color = tuple(v // 256 for v in canvas.winfo_rgb(fill)) + (255,)
+        self.line_width = width
+        self.raster = Raster(size[0], size[1], background=(0, 0, 0, 0))
+        self.item = None
+        self.target = 0
+        self.drawn = 0
+        self.calls = 0  # 图像更新和create_image调用次数
+
+    def draw_all(self):
+        """立即模式：一次画完整条曲线"""
+        self.extend_to(self.n_points)
+        self.flush()
+
+    def extend_to(self, count):
+        """逐步模式：记下要画到的位置，实际绘制留给flush()"""
+        self.target = max(self.target, min(count, self.n_points))
+
+    def flush(self):
+        """把到目标位置为止新增的线段一次画进缓冲区，再更新一次图像"""
+        count = self.target
+        if count <= self.drawn:
+            return
+        start = max(self.drawn - 1, 0)
+        breaks = self.breaks[(self.breaks > start) & (self.breaks < count)] - start
+        self.raster.draw_polyline(self.xs[start:count], self.ys[start:count], self.color,
+                                  self.line_width, breaks, antialias=True)
+        self.drawn = count
+        self.blit()
+
+    def blit(self):
+        """把缓冲区更新到PhotoImage，第一次时创建图像对象"""
+        data = base64.b64encode(self.raster.to_png(RASTER_PNG_LEVEL)).decode("ascii")
+        photo = self.images.get(self.key)
+        if photo is None:
+            import tkinter
+            photo = self.images[self.key] = tkinter.PhotoImage(master=self.canvas, data=data, format="png")
+        else:
+            photo.configure(data=data, format="png")
+        if self.item is None:
+            self.item = self.canvas.create_image(0, 0, image=photo, anchor="nw", tags=self.tags)
+            # 图层放在最下面，Y上限线、标记和手动笔迹等矢量对象保持在上层
+            self.canvas.tag_lower(self.item)
+            self.calls += 1
+        self.calls += 1
+
+    @property
+    def finished(self):
+        return self.drawn >= self.n_points
+
+
+def make_renderer(canvas, xs, ys, tags, size, images, breaks=(), threshold=RASTER_THRESHOLD, **options):
+    """按点数自动选择绘制方式：点数少时用折线对象，超过threshold时用栅格图层"""
+    if len(xs) > threshold:
+        return RasterRenderer(canvas, xs, ys, tags, size, images, breaks=breaks, **options)
+    return PolylineRenderer(canvas, flatten_points(xs, ys), tags, breaks=breaks, **options)
@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+import numpy as np
+
+
+# 默认缓存目录（相对于当前工作目录）和大小上限
+CACHE_DIR = ".sample_cache"
+MAX_BYTES = 256 * 1024 * 1024
+
+
+class SampleCache:
+    """磁盘上的采样结果缓存，跨会话保留计算很慢的函数曲线
+
+    键由调用方组成，应包括函数源码的哈希和全部参数；文件名是键的哈希。
+    每条曲线的 (x数组, y数组) 叠成一个 (2, n) 数组保存为.npy文件，
+    读取时用内存映射打开，不复制也不重新计算。总大小超出上限时按
+    最近使用时间（读取时更新文件修改时间）淘汰。
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, digest + ".npy")
+
+    def get(self, key):
+        """命中时返回 (x数组, y数组)，两者都是只读的内存映射，否则返回None"""
+        path = self.path(key)
+        try:
+            data = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if data.ndim != 2 or data.shape[0] != 2:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data[0], data[1]
+
+    def put(self, key, xs, ys):
+        """保存一条曲线，超出大小上限时淘汰最久未使用的曲线，写入失败时忽略"""
+        data = np.stack((np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)))
+        if data.nbytes > self.max_bytes:
+            return
+        path = self.path(key)
+        # 先写临时文件再改名，中途退出不会留下不完整的缓存
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp, "wb") as f:
+                np.save(f, data)
+            os.replace(temp, path)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def entries(self):
+        """缓存文件列表 [(修改时间, 大小, 路径)]，按最近使用时间从旧到新排列"""
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return result
+        for name in names:
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((st.st_mtime_ns, st.st_size, path))
+        result.sort()
+        return result
+
+    @property
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """删除最久未使用的曲线直到总大小不超过上限"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Windows上仍被映射的文件不能删除，留到下次
+                continue
+            total -= size
+
+    def clear(self):
+        """删除全部缓存文件，返回删除的文件数"""
+        removed = 0
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,358 @@
+import numpy as np
+
+
+# 内置函数类型
+BUILTIN_TYPES = ("sine", "cosine", "parabola", "linear")
+
+# 自动缩放忽略离群值：只使用 [Q1 - k*IQR, Q3 + k*IQR] 范围内的值
+SCALE_PERCENTILES = (25, 75)
+OUTLIER_FENCE = 3
+
+# 自定义函数的种类由第一个参数名决定：t 为参数方程 (x(t), y(t))，theta 为极坐标方程 r(θ)
+CURVE_KINDS = {"t": "parametric", "theta": "polar", "θ": "polar"}
+# 参数方程和极坐标曲线的默认参数范围（圈数，每圈2π）和每圈的采样点数
+CURVE_TURNS = 4
+CURVE_SAMPLES_PER_TURN = 2000
+
+
+class EvalErrors:
+    """一次绘图中的计算错误汇总：按错误信息计数，绘图结束时只报告一次"""
+
+    def __init__(self):
+        self.counts = {}
+        self.non_finite = 0  # 结果为NaN或无穷大的点数
+
+    def add(self, message, count=1):
+        self.counts[message] = self.counts.get(message, 0) + count
+
+    def merge(self, other):
+        if other:
+            for message, count in other.counts.items():
+                self.add(message, count)
+            self.non_finite += other.non_finite
+        return self
+
+    def __bool__(self):
+        return bool(self.counts) or self.non_finite > 0
+
+    def __str__(self):
+        parts = []
+        if self.counts:
+            message = max(self.counts, key=self.counts.get)
+            parts.append(f"{sum(self.counts.values())} 个点计算失败（{message}）")
+        if self.non_finite:
+            parts.append(f"{self.non_finite} 个点无定义或为无穷大")
+        return "，".join(parts)
+
+
+def sample_grid(x_start, x_end, step=2):
+    """生成采样点的x坐标数组（包含右端点）"""
+    count = int((x_end - x_start) // step) + 1
+    xs = x_start + step * np.arange(max(count, 1), dtype=float)
+    if xs[-1] < x_end:
+        xs = np.append(xs, float(x_end))
+    return xs
+
+
+def evaluate_builtin(func_type, xs, width, center_y, amp, freq):
+    """一次性计算内置函数在整个x网格上的Y值"""
+    if func_type == "sine":
+        return center_y + amp * np.sin(freq * np.pi * xs / width * 2)
+    elif func_type == "cosine":
+        return center_y + amp * np.cos(freq * np.pi * xs / width * 2)
+    elif func_type == "parabola":
+        normalized_x = (xs - width / 2) / (width / 2)
+        return center_y + amp * normalized_x ** 2
+    else:  # linear
+        return np.full(xs.shape, float(center_y))
+
+
+def evaluate_custom(func, xs, width, center_y, amp, freq):
+    """计算自定义函数的Y值，返回 (y数组, 错误汇总或None)
+
+    先尝试把整个x数组一次传入（适用于用numpy写成的函数），
+    失败时退回到逐点计算。计算失败的点和NaN、无穷大都记为NaN，
+    绘制时在这些位置断开曲线。
+    """
+    errors = EvalErrors()
+    ys = None
+    with np.errstate(all="ignore"):
+        try:
+            result = np.asarray(func(xs, width, center_y, amp, freq))
+            if result.shape == xs.shape and result.dtype.kind in "biufc":
+                ys = _to_real(result)
+            elif result.ndim == 0 and result.dtype.kind in "biufc":
+                # 常数函数
+                ys = np.full(xs.shape, _to_real(result).item())
+        except Exception:
+            pass
+
+        if ys is None:
+            # 逐点回退
+            ys = np.empty(xs.shape, dtype=float)
+            for i, x_val in enumerate(xs.tolist()):
+                try:
+                    result = func(x_val, width, center_y, amp, freq)
+                    # 确保返回值是实数
+                    if isinstance(result, complex):
+                        # 如果是复数，取其实部
+                        result = result.real
+                    ys[i] = result
+                except Exception as e:
+                    errors.add(f"{type(e).__name__}: {e}")
+                    ys[i] = np.nan
+
+    finite = np.isfinite(ys)
+    if not finite.all():
+        errors.non_finite = int(len(ys) - finite.sum()) - sum(errors.counts.values())
+        ys = np.where(finite, ys, np.nan)
+    return ys, errors if errors else None
+
+
+def function_kind(func):
+    """自定义函数的种类：普通函数 function、参数方程 parametric 或极坐标方程 polar"""
+    code = getattr(getattr(func, "scalar_func", func), "__code__", None)
+    if code is None or not code.co_argcount:
+        return "function"
+    return CURVE_KINDS.get(code.co_varnames[0], "function")
+
+
+def curve_grid(turns=CURVE_TURNS, samples_per_turn=CURVE_SAMPLES_PER_TURN):
+    """参数方程/极坐标曲线的参数网格：从0到turns圈"""
+    count = max(int(turns * samples_per_turn), 2)
+    return np.linspace(0, 2 * np.pi * turns, count + 1)
+
+
+def evaluate_curve(func, kind, ts, width, center_y, amp, freq):
+    """计算参数方程或极坐标曲线，返回 (形状为 (2, n) 的画布坐标数组, 错误汇总或None)
+
+    参数方程与普通函数一样直接返回画布坐标 (x, y)；极坐标方程返回r，
+    以画布中心为原点、θ按逆时针方向换算为画布坐标。与evaluate_custom
+    一样先整体求值，失败时逐点计算，无定义的点两个坐标都记为NaN。
+    """
+    if kind == "polar":
+        r, errors = evaluate_custom(func, ts, width, center_y, amp, freq)
+        return np.stack((width / 2 + r * np.cos(ts), center_y - r * np.sin(ts))), errors
+
+    errors = EvalErrors()
+    points = None
+    with np.errstate(all="ignore"):
+        try:
+            values = [np.asarray(value) for value in func(ts, width, center_y, amp, freq)]
+            if len(values) == 2 and all(value.dtype.kind in "biufc" for value in values):
+                points = np.empty((2,) + ts.shape)
+                points[0], points[1] = _to_real(values[0]), _to_real(values[1])
+        except Exception:
+            points = None
+
+        if points is None:
+            # 逐点回退
+            points = np.empty((2,) + ts.shape)
+            for i, t in enumerate(ts.tolist()):
+                try:
+                    x, y = func(t, width, center_y, amp, freq)
+                    points[:, i] = (x.real if isinstance(x, complex) else x,
+                                    y.real if isinstance(y, complex) else y)
+                except Exception as e:
+                    errors.add(f"{type(e).__name__}: {e}")
+                    points[:, i] = np.nan
+
+    finite = np.isfinite(points).all(axis=0)
+    if not finite.all():
+        errors.non_finite = int(len(ts) - finite.sum()) - sum(errors.counts.values())
+        points[:, ~finite] = np.nan
+    return points, errors if errors else None
+
+
+def evaluate_kind(func, kind, xs, width, center_y, amp, freq):
+    """按函数种类计算：普通函数返回y数组，曲线返回 (2, n) 坐标数组；同时返回错误汇总"""
+    if kind == "function":
+        return evaluate_custom(func, xs, width, center_y, amp, freq)
+    return evaluate_curve(func, kind, xs, width, center_y, amp, freq)
+
+
+def _to_real(values):
+    """复数结果取实部，并转换为浮点数组"""
+    if np.iscomplexobj(values):
+        values = values.real
+    return values.astype(float, copy=False)
+
+
+def is_vectorized(func):
+    """能否在GUI线程中直接批量求值：内置函数（None或类型名）和expr_compiler编译出的计算器
+
+    其他自定义函数可能逐点计算、任意慢，只能放到后台计算。
+    """
+    return func is None or isinstance(func, str) or getattr(func, "vectorized", False)
+
+
+def sample_function(func_type, xs, width, center_y, amp, freq, custom_func=None):
+    """采样引擎入口：在整个x网格上批量求值，返回 (y数组, 错误信息)"""
+    if func_type == "custom" and custom_func:
+        return evaluate_custom(custom_func, xs, width, center_y, amp, freq)
+    return evaluate_builtin(func_type, xs, width, center_y, amp, freq), None
+
+
+def sample_many(funcs, xs, width, center_y, amp, freq):
+    """在同一个x网格上批量计算多个函数，返回 (二维y数组, 错误信息列表)
+
+    funcs中的每一项是内置函数类型名或自定义函数，结果的每一行对应一个函数，
+    可以对整个数组一次求最值来统一缩放。
+    """
+    ys = np.empty((len(funcs), len(xs)), dtype=float)
+    errors = []
+    for row, func in zip(ys, funcs):
+        if isinstance(func, str):
+            row[:] = evaluate_builtin(func, xs, width, center_y, amp, freq)
+            errors.append(None)
+        else:
+            row[:], error = evaluate_custom(func, xs, width, center_y, amp, freq)
+            errors.append(error)
+    return ys, errors
+
+
+def scale_limits(ys, min_range=0):
+    """稳健的Y值范围，返回 (最小值, 最大值)，没有有限值时返回None
+
+    忽略NaN；极点附近的巨大值超出百分位数围栏的部分不参与缩放。
+    围栏宽度至少为min_range，避免几乎水平的曲线上的窄脉冲被截掉。
+    """
+    ys = np.asarray(ys, dtype=float).ravel()
+    ys = ys[np.isfinite(ys)]
+    if not len(ys):
+        return None
+    min_y = float(ys.min())
+    max_y = float(ys.max())
+    low, high = np.percentile(ys, SCALE_PERCENTILES)
+    fence = OUTLIER_FENCE * max(high - low, min_range)
+    return max(min_y, low - fence), min(max_y, high + fence)
+
+
+def compute_scale(ys, canvas_height, center_y, limits=None):
+    """根据Y值范围计算缩放比例和偏移量，确保图像在画布内
+
+    limits为已知的 (最小值, 最大值)（例如区间算术得到的范围）时直接使用，不再扫描ys。
+    """
+    # 留10%的边距
+    available_height = canvas_height * 0.9
+    if limits is None:
+        limits = scale_limits(ys, available_height)
+    if limits:
+        min_y, max_y = limits
+        y_range = max(1, max_y - min_y)  # 避免除零
+    else:
+        min_y = center_y - 50
+        max_y = center_y + 50
+        y_range = 100
+
+    scale_factor = available_height / y_range
+    if scale_factor > 1:
+        scale_factor = 1  # 不放大，只缩小
+
+    # 计算新的中心Y坐标
+    new_center_y = (min_y + max_y) / 2
+    offset_y = canvas_height / 2 - new_center_y * scale_factor
+    return scale_factor, offset_y
+
+
+def fit_curve(xs, ys, width, height):
+    """参数方程/极坐标曲线的缩放：两个方向用同一比例保持形状，曲线居中并占画布的90%
+
+    与compute_scale不同，曲线的坐标单位是任意的，所以也会放大。
+    返回 (缩放比例, x偏移, y偏移)。
+    """
+    x_limits = scale_limits(xs)
+    y_limits = scale_limits(ys)
+    if not x_limits or not y_limits:
+        return 1.0, 0.0, 0.0
+    (min_x, max_x), (min_y, max_y) = x_limits, y_limits
+    spans = [(width, max_x - min_x), (height, max_y - min_y)]
+    ratios = [size / span for size, span in spans if span > 1e-12]
+    scale_factor = 0.9 * min(ratios) if ratios else 1.0
+    offset_x = width / 2 - (min_x + max_x) / 2 * scale_factor
+    offset_y = height / 2 - (min_y + max_y) / 2 * scale_factor
+    return scale_factor, offset_x, offset_y
+
+
+def adaptive_sample(evaluate, x_start, x_end, canvas_height, center_y, tolerance=0.5,
+                    initial_step=16, min_step=0.25, max_levels=12, cancelled=None):
+    """自适应采样：在像素误差大的地方加密，在平滑的地方稀疏
+
+    evaluate接收x数组、返回y数组。先按initial_step粗采样，然后反复检查
+    每个区间的1/4、1/2、3/4处与弦的像素误差（只查中点时，中点恰好落在弦上
+    的区间会漏掉），超过容差的区间对半细分（不小于min_step），1/4、3/4点
+    就是子区间的中点，不重复计算；最后去掉误差很小的冗余点。
+    误差预算细分占3/4、精简占1/4，总误差不超过tolerance。返回 (x数组, y数组)。
+    """
+    xs = sample_grid(x_start, x_end, initial_step)
+    ys = np.asarray(evaluate(xs), dtype=float)
+    scale_factor, _ = compute_scale(ys, canvas_height, center_y)
+    refine_tolerance = tolerance * 0.75
+
+    xl, xr, yl, yr = xs[:-1], xs[1:], ys[:-1], ys[1:]
+    xm = (xl + xr) / 2
+    ym = np.asarray(evaluate(xm), dtype=float)
+    parts_x, parts_y = [xs], [ys]
+    for _ in range(max_levels):
+        if cancelled and cancelled():
+            break
+        # 只检查还能再分的区间
+        splittable = (xr - xl) >= 2 * min_step
+        xl, xr, yl, yr = xl[splittable], xr[splittable], yl[splittable], yr[splittable]
+        xm, ym = xm[splittable], ym[splittable]
+        n = len(xl)
+        if not n:
+            break
+
+        quarter = (xr - xl) / 4
+        xq = np.concatenate((xl + quarter, xr - quarter))
+        yq = np.asarray(evaluate(xq), dtype=float)
+        y1, y3 = yq[:n], yq[n:]
+        with np.errstate(invalid="ignore"):
+            error = np.maximum(np.maximum(np.abs(y1 - (0.75 * yl + 0.25 * yr)),
+                                          np.abs(ym - (yl + yr) / 2)),
+                               np.abs(y3 - (0.25 * yl + 0.75 * yr))) * scale_factor
+            refine = error > refine_tolerance
+        if not refine.any():
+            break
+
+        # 细分的区间的中点成为输出点，1/4、3/4点是两个子区间的中点
+        parts_x.append(xm[refine])
+        parts_y.append(ym[refine])
+        xl, xr, xm = (np.concatenate((xl[refine], xm[refine])), np.concatenate((xm[refine], xr[refine])),
+                      np.concatenate((xq[:n][refine], xq[n:][refine])))
+        yl, yr, ym = (np.concatenate((yl[refine], ym[refine])), np.concatenate((ym[refine], yr[refine])),
+                      np.concatenate((y1[refine], y3[refine])))
+
+    xs = np.concatenate(parts_x)
+    ys = np.concatenate(parts_y)
+    order = np.argsort(xs, kind="stable")
+    xs, ys = xs[order], ys[order]
+
+    scale_factor, _ = compute_scale(ys, canvas_height, center_y)
+    keep = decimate(xs, ys, (tolerance - refine_tolerance) / scale_factor)
+    return xs[keep], ys[keep]
+
+
+def decimate(xs, ys, tolerance, passes=8):
+    """返回保留点的布尔掩码，去掉与相邻点连线的竖直误差很小的点
+
+    每一轮只去掉隔一个的内部点，第k轮的容差为 tolerance / 2**k，
+    因此累计误差不会超过tolerance。
+    """
+    keep = np.ones(len(xs), dtype=bool)
+    for k in range(1, passes + 1):
+        idx = np.flatnonzero(keep)
+        if len(idx) < 3:
+            break
+        candidate = idx[1:-1:2]
+        left = idx[0:-2:2][:len(candidate)]
+        right = idx[2::2][:len(candidate)]
+
+        t = (xs[candidate] - xs[left]) / (xs[right] - xs[left])
+        chord = ys[left] + t * (ys[right] - ys[left])
+        drop = np.abs(ys[candidate] - chord) <= tolerance / 2 ** k
+        if not drop.any():
+            break
+        keep[candidate[drop]] = False
+    return keep
@@ -0,0 +1,80 @@
+import time
+
+
+# 每帧用于绘制的时间预算（毫秒）
+FRAME_BUDGET_MS = 8
+# 按目标时长播放时的帧间隔（毫秒），约60帧每秒
+FRAME_INTERVAL_MS = 16
+# 每次检查时钟之间推进的单位数，减少计时开销
+BATCH = 16
+
+
+class FrameScheduler:
+    """按每帧时间预算推进动画
+
+    每帧尽量多地推进已预计算好的绘制单位，直到用完时间预算或达到
+    目标进度，然后通过 after() 把控制权交还给Tk主循环，保证停止和
+    清除按钮随时可以响应。
+
+    advance(count) 把绘制推进到前count个单位；on_frame() 每帧调用
+    一次（用于更新标签）；on_done() 在全部完成后调用。
+    duration 为None时尽快完成，否则按目标总时长（秒）均匀推进。
+    """
+
+    def __init__(self, root, total, advance, on_frame=None, on_done=None,
+                 duration=None, budget_ms=FRAME_BUDGET_MS):
+        self.root = root
+        self.total = total
+        self.advance = advance
+        self.on_frame = on_frame
+        self.on_done = on_done
+        self.duration = duration
+        self.budget = budget_ms / 1000
+        self.position = 0
+        self.after_id = None
+        self.start_time = None
+
+    def start(self):
+        """开始调度"""
+        self.start_time = time.perf_counter()
+        self._tick()
+
+    def cancel(self):
+        """取消尚未执行的帧"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    @property
+    def running(self):
+        return self.after_id is not None
+
+    def _target(self, now):
+        """当前帧允许推进到的位置"""
+        if not self.duration:
+            return self.total
+        progress = (now - self.start_time) / self.duration
+        return min(self.total, max(self.position + 1, int(self.total * progress)))
+
+    def _tick(self):
+        self.after_id = None
+        frame_start = time.perf_counter()
+        target = self._target(frame_start)
+
+        # 在预算内尽量多地推进
+        while self.position < target:
+            self.position = min(target, self.position + BATCH)
+            self.advance(self.position)
+            if time.perf_counter() - frame_start >= self.budget:
+                break
+
+        if self.on_frame:
+            self.on_frame()
+
+        if self.position >= self.total:
+            if self.on_done:
+                self.on_done()
+            return
+
+        delay = FRAME_INTERVAL_MS if self.duration else 1
+        self.after_id = self.root.after(delay, self._tick)
@@ -0,0 +1,206 @@
+import mmap
+import struct
+import time
+from array import array
+
+from lazy_import import LazyModule
+
+# 手动绘制本身不需要numpy，简化、缩放和保存笔迹时才导入
+np = LazyModule("numpy")
+
+
+# 笔迹文件格式：文件头、每笔的索引、全部坐标(float32 x,y交错)、全部时间戳(float32)
+STROKE_MAGIC = b"STRK"
+STROKE_VERSION = 1
+_HEADER = struct.Struct("<4sHHffII")   # 标识, 版本, 保留, 画布宽, 画布高, 笔画数, 总点数
+_INDEX = struct.Struct("<IId")         # 起始点序号, 点数, 开始时间
+
+
+def rdp_simplify(xs, ys, tolerance):
+    """Ramer–Douglas–Peucker折线简化，返回保留点的布尔掩码
+
+    被去掉的点到简化后折线的距离都不超过tolerance（像素）。
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    n = len(xs)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx = xs[end] - xs[start]
+        dy = ys[end] - ys[start]
+        px = xs[start + 1:end] - xs[start]
+        py = ys[start + 1:end] - ys[start]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distance = np.hypot(px, py)
+        else:
+            distance = np.abs(px * dy - py * dx) / length
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+class Stroke:
+    """一笔笔迹：连续的float32坐标缓冲区和相对开始时间的时间戳"""
+
+    def __init__(self, start_time, points=None, times=None):
+        self.start_time = start_time
+        self.points = array("f") if points is None else points
+        self.times = array("f") if times is None else times
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, x, y, t):
+        self.points.append(x)
+        self.points.append(y)
+        self.times.append(t - self.start_time)
+
+    def coords(self):
+        """create_line/coords 需要的坐标列表"""
+        return self.points.tolist()
+
+    def keep(self, mask):
+        """只保留mask为True的点"""
+        xy = np.frombuffer(self.points, dtype=np.float32).reshape(-1, 2)[mask]
+        ts = np.frombuffer(self.times, dtype=np.float32)[mask]
+        self.points = array("f", xy.ravel().tobytes())
+        self.times = array("f", ts.tobytes())
+
+
+class StrokeStore:
+    """手动笔迹的紧凑存储，每个点只占12字节（x, y, 时间戳）
+
+    坐标属于 width x height 的画布空间。支持保存为二进制文件、用内存
+    映射加载，以及按任意画布尺寸回放。
+    """
+
+    def __init__(self, width=0, height=0):
+        self.width = width
+        self.height = height
+        self.strokes = []
+        self.current = None
+        self._mmap = None
+
+    def begin(self, x, y, t=None):
+        """开始新的一笔"""
+        t = time.time() if t is None else t
+        self.current = Stroke(t)
+        self.current.append(x, y, t)
+        self.strokes.append(self.current)
+        return self.current
+
+    def add(self, x, y, t=None):
+        if self.current is not None:
+            self.current.append(x, y, time.time() if t is None else t)
+
+    def end(self, mask=None):
+        """结束当前笔画，mask为简化后要保留的点"""
+        if self.current is not None and mask is not None:
+            self.current.keep(mask)
+        self.current = None
+
+    def clear(self):
+        self.strokes = []
+        self.current = None
+        self._mmap = None
+
+    @property
+    def point_count(self):
+        return sum(len(stroke) for stroke in self.strokes)
+
+    @property
+    def nbytes(self):
+        return self.point_count * 12 + len(self.strokes) * _INDEX.size
+
+    def detach(self):
+        """把内存映射的笔迹复制到内存中，之后可以安全地覆盖原文件"""
+        if self._mmap is None:
+            return
+        for stroke in self.strokes:
+            if not isinstance(stroke.points, array):
+                stroke.points = array("f", stroke.points.tobytes())
+                stroke.times = array("f", stroke.times.tobytes())
+        self._mmap = None
+
+    def rescale_to(self, width, height):
+        """把所有笔迹从当前坐标空间缩放到新的画布尺寸"""
+        if self.width and self.height and (width, height) != (self.width, self.height):
+            self.detach()
+            scale_x = width / self.width
+            scale_y = height / self.height
+            for stroke in self.strokes:
+                xy = np.frombuffer(stroke.points, dtype=np.float32)
+                xy[0::2] *= scale_x
+                xy[1::2] *= scale_y
+        self.width = width
+        self.height = height
+
+    def save(self, path):
+        """保存为二进制笔迹文件"""
+        self.detach()
+        strokes = [stroke for stroke in self.strokes if len(stroke)]
+        total = sum(len(stroke) for stroke in strokes)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(STROKE_MAGIC, STROKE_VERSION, 0, self.width, self.height,
+                                 len(strokes), total))
+            offset = 0
+            for stroke in strokes:
+                f.write(_INDEX.pack(offset, len(stroke), stroke.start_time))
+                offset += len(stroke)
+            for stroke in strokes:
+                f.write(memoryview(stroke.points).cast("B"))
+            for stroke in strokes:
+                f.write(memoryview(stroke.times).cast("B"))
+
+    @classmethod
+    def load(cls, path):
+        """用内存映射加载笔迹文件，坐标和时间戳直接引用文件内容而不复制"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) < _HEADER.size:
+            raise ValueError("不是有效的笔迹文件")
+        magic, version, _, width, height, count, total = _HEADER.unpack_from(mapped, 0)
+        if magic != STROKE_MAGIC or version != STROKE_VERSION:
+            raise ValueError("不是有效的笔迹文件")
+
+        store = cls(width, height)
+        store._mmap = mapped
+        data = memoryview(mapped)
+        points_start = _HEADER.size + count * _INDEX.size
+        times_start = points_start + total * 8
+        if len(mapped) < times_start + total * 4:
+            raise ValueError("笔迹文件已损坏")
+        all_points = data[points_start:times_start].cast("f")
+        all_times = data[times_start:times_start + total * 4].cast("f")
+        for i in range(count):
+            offset, n, start_time = _INDEX.unpack_from(mapped, _HEADER.size + i * _INDEX.size)
+            store.strokes.append(Stroke(start_time, all_points[2 * offset:2 * (offset + n)],
+                                        all_times[offset:offset + n]))
+        return store
+
+    def replay(self, canvas, canvas_width, canvas_height, tags="manual_draw", **options):
+        """把所有笔迹按当前画布尺寸一次画到画布上，每笔一个折线对象"""
+        scale_x = canvas_width / self.width if self.width else 1
+        scale_y = canvas_height / self.height if self.height else 1
+        items = []
+        for stroke in self.strokes:
+            if len(stroke) < 2:
+                continue
+            xy = np.frombuffer(stroke.points, dtype=np.float32).astype(float)
+            xy[0::2] *= scale_x
+            xy[1::2] *= scale_y
+            items.append(canvas.create_line(xy.tolist(), tags=tags, **options))
+        return items
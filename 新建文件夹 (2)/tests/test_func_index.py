@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from func_index import ENGINE_MODULES, FunctionIndex, is_engine_module, split_name
+
+
+def test_engine_module_names_are_rejected():
+    for stem in ENGINE_MODULES:
+        assert is_engine_module(stem)
+        assert is_engine_module(f"{stem}:my_func")
+    assert is_engine_module("Sampler")
+    assert is_engine_module("./interval")
+
+
+def test_function_file_names_are_accepted():
+    for name in ("custom_func", "wave_func", "test_custom:another_func", "sampler_test", "my_lod"):
+        assert not is_engine_module(name)
+
+
+def test_index_excludes_engine_modules(tmp_path):
+    source = "def f(x, width, center_y, amp, freq):\n    return x\n"
+    for stem in ("perf", "my_func"):
+        (tmp_path / f"{stem}.py").write_text(source, encoding="utf-8")
+    index = FunctionIndex(str(tmp_path), exclude=ENGINE_MODULES)
+    index.scan()
+    assert index.names() == ["my_func:f"]
+    assert split_name("my_func:f") == ("my_func.py", "f")
@@ -0,0 +1,227 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from func_loader import FunctionCache
+from sampler import EvalErrors, adaptive_sample, evaluate_custom, evaluate_kind
+
+
+# 每个任务计算的点数，越小取消越及时
+CHUNK_SIZE = 256
+
+# 子进程中的函数缓存，每个进程只加载一次函数文件
+_process_cache = None
+
+
+def _eval_chunk(func, kind, xs, width, center_y, amp, freq, cancel_event):
+    """线程模式：计算一块x坐标（曲线为一块参数值）"""
+    if cancel_event.is_set():
+        return None
+    return evaluate_kind(func, kind, xs, width, center_y, amp, freq)
+
+
+def _eval_chunk_in_process(file_path, func_name, kind, xs, width, center_y, amp, freq):
+    """进程模式：在子进程中加载函数文件并计算一块x坐标"""
+    global _process_cache
+    if _process_cache is None:
+        _process_cache = FunctionCache()
+    func = _process_cache.load(file_path, func_name)
+    return evaluate_kind(func, kind, xs, width, center_y, amp, freq)
+
+
+def _adaptive(func, x_end, width, center_y, amp, freq, canvas_height, tolerance, cancel_event):
+    """自适应采样整条曲线，返回 (x数组, y数组, 错误汇总或None)"""
+    errors = EvalErrors()
+
+    def evaluate(xs):
+        ys, error = evaluate_custom(func, xs, width, center_y, amp, freq)
+        errors.merge(error)
+        return ys
+
+    xs, ys = adaptive_sample(evaluate, 0, x_end, canvas_height, center_y, tolerance,
+                             cancelled=cancel_event.is_set if cancel_event else None)
+    return xs, ys, errors if errors else None
+
+
+def _adaptive_in_process(file_path, func_name, *args):
+    """进程模式的自适应采样"""
+    global _process_cache
+    if _process_cache is None:
+        _process_cache = FunctionCache()
+    func = _process_cache.load(file_path, func_name)
+    return _adaptive(func, *args, None)
+
+
+class EvalJob:
+    """一次后台计算任务，结果按块汇总
+
+    普通函数的ys是y数组；参数方程和极坐标曲线的xs是参数网格，
+    ys是形状为 (2, n) 的画布坐标数组。
+    """
+
+    def __init__(self, job_id, xs, components=1):
+        self.id = job_id
+        self.xs = xs
+        # 自适应采样的任务在完成时才得到xs和ys
+        self.ys = None
+        if xs is not None:
+            self.ys = np.empty(xs.shape if components == 1 else (components,) + xs.shape, dtype=float)
+        self.total = 0
+        self.done = 0
+        # 从头开始连续完成的点数，计算未完成时可以先画出这一部分
+        self.ready = 0
+        self.filled = None if xs is None else np.zeros(-(-len(xs) // CHUNK_SIZE), dtype=bool)
+        self.errors = EvalErrors()
+        self.futures = []
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def error(self):
+        """所有分块的错误汇总，没有错误时为None"""
+        return self.errors if self.errors else None
+
+
+class EvalWorker:
+    """在线程池或进程池中分块计算耗时的自定义函数
+
+    结果通过队列传回，由GUI线程用 root.after 定时调用 poll() 取出，
+    工作线程从不直接访问Tk对象。cancel() 会取消尚未开始的块，
+    正在计算的块完成后其结果会被丢弃。
+    """
+
+    def __init__(self, mode="thread", max_workers=None):
+        self.mode = mode
+        self.max_workers = max_workers
+        self.executor = None
+        self.results = queue.Queue()
+        self.job = None
+        self._ids = itertools.count(1)
+
+    def _get_executor(self):
+        if self.executor is None:
+            if self.mode == "process":
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="eval")
+        return self.executor
+
+    def set_mode(self, mode):
+        """切换线程/进程模式，旧的执行器会被关闭"""
+        if mode != self.mode:
+            self.cancel()
+            self.shutdown()
+            self.mode = mode
+
+    def submit(self, func, xs, width, center_y, amp, freq, file_path=None, func_name=None,
+               kind="function"):
+        """提交一次计算，返回EvalJob；进程模式需要函数文件路径和函数名"""
+        self.cancel()
+        job = EvalJob(next(self._ids), xs, 1 if kind == "function" else 2)
+        executor = self._get_executor()
+        use_process = self.mode == "process" and file_path is not None
+
+        for start in range(0, len(xs), CHUNK_SIZE):
+            chunk = xs[start:start + CHUNK_SIZE]
+            if use_process:
+                future = executor.submit(_eval_chunk_in_process, file_path, func_name, kind,
+                                         chunk, width, center_y, amp, freq)
+            else:
+                future = executor.submit(_eval_chunk, func, kind, chunk, width, center_y,
+                                         amp, freq, job.cancel_event)
+            future.add_done_callback(self._make_callback(job.id, start))
+            job.futures.append(future)
+            job.total += 1
+
+        self.job = job
+        return job
+
+    def submit_adaptive(self, func, x_end, width, center_y, amp, freq, canvas_height,
+                        tolerance, file_path=None, func_name=None):
+        """提交一次自适应采样，整条曲线作为一个任务，完成后一次返回"""
+        self.cancel()
+        job = EvalJob(next(self._ids), None)
+        executor = self._get_executor()
+        args = (x_end, width, center_y, amp, freq, canvas_height, tolerance)
+        if self.mode == "process" and file_path is not None:
+            future = executor.submit(_adaptive_in_process, file_path, func_name, *args)
+        else:
+            future = executor.submit(_adaptive, func, *args, job.cancel_event)
+        future.add_done_callback(self._make_callback(job.id, None))
+        job.futures.append(future)
+        job.total = 1
+
+        self.job = job
+        return job
+
+    def _make_callback(self, job_id, start):
+        def callback(future):
+            if future.cancelled():
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                result = (None, f"{type(e).__name__}: {e}")
+            self.results.put((job_id, start, result))
+        return callback
+
+    def poll(self):
+        """在GUI线程中调用：取出已完成的块，返回当前任务（没有任务时返回None）"""
+        job = self.job
+        while True:
+            try:
+                job_id, start, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job is None or job_id != job.id or job.cancelled or result is None:
+                continue
+            if start is None:
+                # 自适应采样一次返回整条曲线
+                if result[0] is None:
+                    job.errors.add(result[1])
+                else:
+                    job.xs, job.ys, error = result
+                    job.errors.merge(error)
+                job.done += 1
+                continue
+            ys, error = result
+            if ys is None:
+                # 整块失败时与逐点计算一样按无定义处理
+                end = min(start + CHUNK_SIZE, len(job.xs))
+                ys = np.full(job.ys[..., start:end].shape, np.nan)
+                job.errors.add(error, end - start)
+            else:
+                job.errors.merge(error)
+            job.ys[..., start:start + ys.shape[-1]] = ys
+            job.done += 1
+            job.filled[start // CHUNK_SIZE] = True
+            chunk = job.ready // CHUNK_SIZE
+            while chunk < len(job.filled) and job.filled[chunk]:
+                chunk += 1
+            job.ready = min(chunk * CHUNK_SIZE, len(job.xs))
+        return job
+
+    def cancel(self):
+        """取消当前任务"""
+        job = self.job
+        if job is not None:
+            job.cancel_event.set()
+            for future in job.futures:
+                future.cancel()
+            self.job = None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None